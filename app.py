@@ -5,7 +5,21 @@ import matplotlib.pyplot as plt
 import numpy as np
 import io
 import contextlib
-from model import run_simulation, HockeyRink
+from model import ENGINES, run_simulation, HockeyRink
+from distributions import default_distributions, make_distribution
+from results_store import PARAM_COLUMNS, ResultsStore
+from comparison import build_scenarios, metric_intervals, paired_differences, parse_values, run_scenarios
+
+# База с историей запусков
+RESULTS_DB = 'results.db'
+
+# Спецификация распределения по выбору пользователя (None - исходное равномерное)
+def make_spec(kind, mean, spread):
+    if kind == 'exponential':
+        return {'kind': 'exponential', 'mean': mean}
+    if kind == 'lognormal':
+        return {'kind': 'lognormal', 'mean': mean, 'std': spread}
+    return None
 
 # Настройка страницы
 st.set_page_config(
@@ -37,6 +51,19 @@ S = st.sidebar.number_input("Интервал между заливками (S,
 L = st.sidebar.number_input("Время заливки льда (L, минуты)", min_value=5, max_value=120, value=30,
                            help="Сколько минут занимает процедура заливки льда")
 
+# Законы распределения случайных величин
+st.sidebar.subheader("Законы распределения")
+DISTRIBUTION_OPTIONS = {
+    "Равномерное (среднее ± разброс)": None,
+    "Экспоненциальное (среднее)": 'exponential',
+    "Логнормальное (среднее, σ = разброс)": 'lognormal',
+}
+arrival_kind = DISTRIBUTION_OPTIONS[st.sidebar.selectbox("Интервалы между группами", list(DISTRIBUTION_OPTIONS))]
+game_kind = DISTRIBUTION_OPTIONS[st.sidebar.selectbox("Время игры", list(DISTRIBUTION_OPTIONS))]
+seed = st.sidebar.number_input("Зерно генератора (0 — случайное)", min_value=0, value=0, step=1)
+engine = st.sidebar.selectbox("Ядро моделирования", list(ENGINES),
+                              help="simpy — исходная модель, heap — облегченное ядро на heapq с теми же результатами")
+
 # Дополнительные настройки
 st.sidebar.header("📊 Настройки отображения")
 show_logs = st.sidebar.checkbox("Показывать логи моделирования", value=False)
@@ -85,457 +112,652 @@ if L > S * 60:
 if L > A * 3:
     validation_errors.append(f"⚠️ Предупреждение: Время заливки ({L} мин) значительно больше среднего времени игры ({A} мин)")
 
-# Показываем ошибки, если они есть
-if validation_errors:
-    st.sidebar.error("Обнаружены ошибки в параметрах:")
-    for error in validation_errors:
-        st.sidebar.write(error)
-    
-    # Блокируем кнопку запуска
-    st.sidebar.button("🚀 Запустить моделирование", type="primary", disabled=True)
-    
-    # Показываем подсказки по правильным значениям
-    st.sidebar.markdown("---")
-    st.sidebar.info("**Рекомендации по параметрам:**")
-    st.sidebar.write("• M ≤ N (разброс ≤ среднего интервала)")
-    st.sidebar.write("• B ≤ A (разброс ≤ среднего времени игры)")
-    st.sidebar.write("• Все значения должны быть положительными")
-    st.sidebar.write("• L должно быть разумным относительно S и A")
-    
-else:   
-    # Кнопка запуска моделирования
-    if st.sidebar.button("🚀 Запустить моделирование", type="primary"):
-        
-        # Показываем индикатор загрузки
-        with st.spinner("Идет моделирование..."):
-            # Захватываем вывод для логов
-            log_output = io.StringIO()
-            
-            with contextlib.redirect_stdout(log_output):
-                # Запускаем модель с выбранными параметрами
-                params = {'N': N, 'M': M, 'A': A, 'B': B, 'K': K, 'T': T, 'S': S, 'L': L}
-                results = run_simulation(params)
-            
-            logs = log_output.getvalue()
-        
-        # Основная область результатов - 6 колонок
-        col1, col2, col3, col4, col5, col6 = st.columns(6)
-        
-        with col1:
-            st.metric(
-                label="Обслуженных групп",
-                value=results.served_groups,
-                delta=f"+{results.served_groups}"
-            )
-        
-        with col2:
-            st.metric(
-                label="Отклоненных групп",
-                value=results.rejected_groups,
-                delta=f"-{results.rejected_groups}",
-                delta_color="inverse"
-            )
-        
-        with col3:
-            st.metric(
-                label="Загрузка коробки",
-                value=f"{results.utilization:.1f}%",
-                delta=f"{results.utilization:.1f}%"
-            )
-        
-        with col4:
-            total_groups = results.served_groups + results.rejected_groups
-            rejection_rate = (results.rejected_groups / total_groups * 100) if total_groups > 0 else 0
-            st.metric(
-                label="Процент отказов",
-                value=f"{rejection_rate:.1f}%",
-                delta=f"{rejection_rate:.1f}%",
-                delta_color="inverse"
-            )
-        
-        with col5:
-            bad_ice_percentage = (results.bad_ice_time / (T * 60)) * 100 if T > 0 else 0
-            st.metric(
-                label="Плохой лед",
-                value=f"{bad_ice_percentage:.1f}%",
-                delta=f"{results.bad_ice_time:.1f} мин",
-                delta_color="inverse"
-            )
-        
-        with col6:
-            st.metric(
-                label="Заливок льда",
-                value=results.ice_resurfacing_count,
-                delta=f"+{results.ice_resurfacing_count}"
-            )
-        
-        # Визуализация результатов
-        st.markdown("---")
-        st.subheader("📊 Визуализация результатов")
-        
-        # Создаем данные для графиков - теперь 6 графиков (3x2)
-        fig, axes = plt.subplots(2, 3, figsize=(18, 10))
-        ax1, ax2, ax3 = axes[0]
-        ax4, ax5, ax6 = axes[1]
-        
-        # График 1: Распределение времени игры (без отрицательных значений)
-        min_game_time = max(0.1, A - B)
-        max_game_time = A + B
-        game_times_example = np.random.uniform(min_game_time, max_game_time, 1000)
-        ax1.hist(game_times_example, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-        ax1.set_xlabel('Время игры (минуты)')
-        ax1.set_ylabel('Частота')
-        ax1.set_title('Распределение времени игры')
-        ax1.grid(True, alpha=0.3)
-        
-        # График 2: Распределение интервалов между группами (без отрицательных значений)
-        min_interval = max(0.1, N - M)
-        max_interval = N + M
-        intervals_example = np.random.uniform(min_interval, max_interval, 1000)
-        ax2.hist(intervals_example, bins=20, alpha=0.7, color='lightgreen', edgecolor='black')
-        ax2.set_xlabel('Интервал между группами (минуты)')
-        ax2.set_ylabel('Частота')
-        ax2.set_title('Распределение интервалов прибытия')
-        ax2.grid(True, alpha=0.3)
-        
-        # График 3: Соотношение обслуженных и отклоненных
-        labels = ['Обслуженные', 'Отклоненные']
-        sizes = [results.served_groups, results.rejected_groups]
-        colors = ['#66b3ff', '#ff6666']
-        
-        if sum(sizes) > 0:
-            ax3.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-            ax3.set_title('Соотношение обслуженных и отклоненных групп')
-        else:
-            ax3.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax3.transAxes)
-            ax3.set_title('Соотношение обслуженных и отклоненных групп')
-        
-        # График 4: Загрузка системы по типам
-        total_time = T * 60
-        game_time_pct = (results.total_game_time / total_time * 100) if total_time > 0 else 0
-        resurfacing_time_pct = (results.total_ice_resurfacing_time / total_time * 100) if total_time > 0 else 0
-        idle_time_pct = max(0, 100 - game_time_pct - resurfacing_time_pct)
-        
-        categories = ['Игры', 'Заливка', 'Простой']
-        values = [game_time_pct, resurfacing_time_pct, idle_time_pct]
-        colors_bar = ['#4CAF50', '#2196F3', '#E0E0E0']
-        bars = ax4.bar(categories, values, color=colors_bar, alpha=0.7)
-        ax4.set_ylabel('Процент времени (%)')
-        ax4.set_title('Распределение времени работы коробки')
-        ax4.set_ylim(0, 100)
-        ax4.grid(True, alpha=0.3)
-        
-        for bar, value in zip(bars, values):
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height + 1,
-                    f'{value:.1f}%', ha='center', va='bottom')
-        
-        # График 5: Время ожидания заливочной машины
-        if hasattr(results, 'ice_resurfacing_wait_times') and results.ice_resurfacing_wait_times:
-            wait_times = results.ice_resurfacing_wait_times
-            ax5.hist(wait_times, bins=min(10, len(wait_times)), alpha=0.7, color='orange', edgecolor='black')
-            ax5.set_xlabel('Время ожидания (минуты)')
-            ax5.set_ylabel('Частота')
-            ax5.set_title('Время ожидания заливочной машины')
-            ax5.grid(True, alpha=0.3)
-            
-            if len(wait_times) > 0:
-                avg_wait = np.mean(wait_times)
-                ax5.axvline(avg_wait, color='red', linestyle='--', alpha=0.7, 
-                           label=f'Среднее: {avg_wait:.1f} мин')
-                ax5.legend()
-        else:
-            ax5.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax5.transAxes)
-            ax5.set_title('Время ожидания заливочной машины')
-        
-        # График 6: Соотношение качества льда
-        bad_ice_pct = (results.bad_ice_time / total_time * 100) if total_time > 0 else 0
-        good_ice_pct = 100 - bad_ice_pct
+# Разделы приложения
+tab_model, tab_compare, tab_history = st.tabs(["🏒 Моделирование", "⚖️ Сравнение сценариев", "🗂️ История запусков"])
+
+with tab_model:
+    # Показываем ошибки, если они есть
+    if validation_errors:
+        st.sidebar.error("Обнаружены ошибки в параметрах:")
+        for error in validation_errors:
+            st.sidebar.write(error)
         
-        ice_labels = ['Хороший лед', 'Плохой лед']
-        ice_sizes = [good_ice_pct, bad_ice_pct]
-        ice_colors = ['#66bb6a', '#ef5350']
+        # Блокируем кнопку запуска
+        st.sidebar.button("🚀 Запустить моделирование", type="primary", disabled=True)
         
-        if total_time > 0:
-            ax6.pie(ice_sizes, labels=ice_labels, colors=ice_colors, autopct='%1.1f%%', startangle=90)
-            ax6.set_title('Соотношение качества льда')
-        else:
-            ax6.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax6.transAxes)
-            ax6.set_title('Соотношение качества льда')
+        # Показываем подсказки по правильным значениям
+        st.sidebar.markdown("---")
+        st.sidebar.info("**Рекомендации по параметрам:**")
+        st.sidebar.write("• M ≤ N (разброс ≤ среднего интервала)")
+        st.sidebar.write("• B ≤ A (разброс ≤ среднего времени игры)")
+        st.sidebar.write("• Все значения должны быть положительными")
+        st.sidebar.write("• L должно быть разумным относительно S и A")
         
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        # Расширенная статистика
-        if show_detailed_stats:
-            st.markdown("---")
-            st.subheader("📈 Детальная статистика")
-            
-            # Расчет дополнительных метрик
-            total_groups = results.served_groups + results.rejected_groups
-            rejection_rate = (results.rejected_groups / total_groups * 100) if total_groups > 0 else 0
-            avg_wait_time = results.total_wait_time / results.served_groups if results.served_groups > 0 else 0
-            efficiency = (results.served_groups / (T * 60)) * 60 if T > 0 else 0  # групп в час
-            
-            # Время работы разбитое по типам
-            total_time_min = T * 60
-            game_time_pct = (results.total_game_time / total_time_min * 100) if total_time_min > 0 else 0
-            resurfacing_time_pct = (results.total_ice_resurfacing_time / total_time_min * 100) if total_time_min > 0 else 0
-            idle_time_pct = max(0, 100 - game_time_pct - resurfacing_time_pct)
-            bad_ice_pct = (results.bad_ice_time / total_time_min * 100) if total_time_min > 0 else 0
+    else:   
+        # Кнопка запуска моделирования
+        if st.sidebar.button("🚀 Запустить моделирование", type="primary"):
             
-            # Основные метрики - 3 колонки
-            col1, col2, col3 = st.columns(3)
+            # Показываем индикатор загрузки
+            with st.spinner("Идет моделирование..."):
+                # Захватываем вывод для логов
+                log_output = io.StringIO()
+                
+                with contextlib.redirect_stdout(log_output):
+                    # Запускаем модель с выбранными параметрами; при зерне 0 выбираем случайное
+                    # конкретное зерно, чтобы запуск из истории можно было повторить
+                    run_seed = seed or int(np.random.SeedSequence().generate_state(1)[0])
+                    params = {'N': N, 'M': M, 'A': A, 'B': B, 'K': K, 'T': T, 'S': S, 'L': L,
+                              'seed': run_seed,
+                              'arrival_dist': make_spec(arrival_kind, N, M),
+                              'game_dist': make_spec(game_kind, A, B)}
+                    results = run_simulation(params, engine=engine)
+                
+                logs = log_output.getvalue()
+
+                # Сохраняем результат в историю запусков
+                with ResultsStore(RESULTS_DB) as store:
+                    store.add_stats(params, results, engine)
+            
+            st.caption(f"Зерно генератора: {run_seed}")
+            
+            # Основная область результатов - 6 колонок
+            col1, col2, col3, col4, col5, col6 = st.columns(6)
             
             with col1:
-                st.markdown("**Основные показатели:**")
-                basic_stats = {
-                    'Показатель': [
-                        'Общее время моделирования',
-                        'Всего поступило групп',
-                        'Обслуженных групп', 
-                        'Отклоненных групп',
-                        'Процент отказов',
-                        'Количество заливок'
-                    ],
-                    'Значение': [
-                        f"{T} часов ({T*60} минут)",
-                        f"{total_groups} групп",
-                        f"{results.served_groups} групп",
-                        f"{results.rejected_groups} групп", 
-                        f"{rejection_rate:.2f}%",
-                        f"{results.ice_resurfacing_count}"
-                    ]
-                }
-                st.table(pd.DataFrame(basic_stats))
+                st.metric(
+                    label="Обслуженных групп",
+                    value=results.served_groups,
+                    delta=f"+{results.served_groups}"
+                )
             
             with col2:
-                st.markdown("**Временные характеристики:**")
-                time_stats = {
-                    'Показатель': [
-                        'Общее время игр',
-                        'Общее время заливки',
-                        'Общее время ожидания групп',
-                        'Время плохого льда',
-                        'Среднее время ожидания',
-                        'Среднее время игры'
-                    ],
-                    'Значение': [
-                        f"{results.total_game_time:.1f} мин ({game_time_pct:.1f}%)",
-                        f"{results.total_ice_resurfacing_time:.1f} мин ({resurfacing_time_pct:.1f}%)",
-                        f"{results.total_wait_time:.1f} мин", 
-                        f"{results.bad_ice_time:.1f} мин ({bad_ice_pct:.1f}%)",
-                        f"{avg_wait_time:.2f} мин",
-                        f"{results.total_game_time/results.served_groups:.1f} мин" if results.served_groups > 0 else "0 мин"
-                    ]
-                }
-                st.table(pd.DataFrame(time_stats))
+                st.metric(
+                    label="Отклоненных групп",
+                    value=results.rejected_groups,
+                    delta=f"-{results.rejected_groups}",
+                    delta_color="inverse"
+                )
             
             with col3:
-                st.markdown("**Эффективность и загрузка:**")
-                efficiency_stats = {
-                    'Показатель': [
-                        'Коэффициент загрузки',
-                        'Время простоя',
-                        'Производительность',
-                        'Интервал между заливками',
-                        'Время заливки',
-                        'Эффективность использования'
-                    ],
-                    'Значение': [
-                        f"{results.utilization:.2f}%",
-                        f"{idle_time_pct:.1f}%",
-                        f"{efficiency:.2f} групп/час",
-                        f"{S} часов",
-                        f"{L} минут",
-                        f"{(game_time_pct / (game_time_pct + resurfacing_time_pct) * 100):.1f}%" if (game_time_pct + resurfacing_time_pct) > 0 else "0%"
-                    ]
-                }
-                st.table(pd.DataFrame(efficiency_stats))
-            
-            # Статистика очереди
-            st.markdown("**Статистика очереди:**")
-            if hasattr(results, 'queue_lengths') and results.queue_lengths:
-                queue_data = {
-                    'Метрика': [
-                        'Максимальная длина очереди',
-                        'Средняя длина очереди', 
-                        'Медианная длина очереди',
-                        'Время с пустой очередью',
-                        'Время с полной очередью',
-                        'Процент времени с очередью'
-                    ],
-                    'Значение': [
-                        f"{max(results.queue_lengths)} групп",
-                        f"{np.mean(results.queue_lengths):.2f} групп",
-                        f"{np.median(results.queue_lengths):.2f} групп",
-                        f"{(results.queue_lengths.count(0) / len(results.queue_lengths) * 100):.1f}%",
-                        f"{(results.queue_lengths.count(K) / len(results.queue_lengths) * 100):.1f}%",
-                        f"{100 - (results.queue_lengths.count(0) / len(results.queue_lengths) * 100):.1f}%"
-                    ]
-                }
-                st.table(pd.DataFrame(queue_data))
+                st.metric(
+                    label="Загрузка коробки",
+                    value=f"{results.utilization:.1f}%",
+                    delta=f"{results.utilization:.1f}%"
+                )
+            
+            with col4:
+                total_groups = results.served_groups + results.rejected_groups
+                rejection_rate = (results.rejected_groups / total_groups * 100) if total_groups > 0 else 0
+                st.metric(
+                    label="Процент отказов",
+                    value=f"{rejection_rate:.1f}%",
+                    delta=f"{rejection_rate:.1f}%",
+                    delta_color="inverse"
+                )
+            
+            with col5:
+                bad_ice_percentage = (results.bad_ice_time / (T * 60)) * 100 if T > 0 else 0
+                st.metric(
+                    label="Плохой лед",
+                    value=f"{bad_ice_percentage:.1f}%",
+                    delta=f"{results.bad_ice_time:.1f} мин",
+                    delta_color="inverse"
+                )
+            
+            with col6:
+                st.metric(
+                    label="Заливок льда",
+                    value=results.ice_resurfacing_count,
+                    delta=f"+{results.ice_resurfacing_count}"
+                )
+            
+            # Визуализация результатов
+            st.markdown("---")
+            st.subheader("📊 Визуализация результатов")
+            
+            # Создаем данные для графиков - теперь 6 графиков (3x2)
+            fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+            ax1, ax2, ax3 = axes[0]
+            ax4, ax5, ax6 = axes[1]
+            
+            # Примеры значений из тех же распределений, что использовались в модели
+            example_rng = np.random.default_rng()
+            dists = default_distributions(params)
+            
+            # График 1: Распределение времени игры (без отрицательных значений)
+            game_dist = make_distribution(params['game_dist']) if params['game_dist'] else dists['game']
+            game_times_example = np.maximum(game_dist.sample(example_rng, 1000), 0.1)
+            ax1.hist(game_times_example, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+            ax1.set_xlabel('Время игры (минуты)')
+            ax1.set_ylabel('Частота')
+            ax1.set_title('Распределение времени игры')
+            ax1.grid(True, alpha=0.3)
+            
+            # График 2: Распределение интервалов между группами (без отрицательных значений)
+            arrival_dist = make_distribution(params['arrival_dist']) if params['arrival_dist'] else dists['arrival']
+            intervals_example = np.maximum(arrival_dist.sample(example_rng, 1000), 0.1)
+            ax2.hist(intervals_example, bins=20, alpha=0.7, color='lightgreen', edgecolor='black')
+            ax2.set_xlabel('Интервал между группами (минуты)')
+            ax2.set_ylabel('Частота')
+            ax2.set_title('Распределение интервалов прибытия')
+            ax2.grid(True, alpha=0.3)
+            
+            # График 3: Соотношение обслуженных и отклоненных
+            labels = ['Обслуженные', 'Отклоненные']
+            sizes = [results.served_groups, results.rejected_groups]
+            colors = ['#66b3ff', '#ff6666']
+            
+            if sum(sizes) > 0:
+                ax3.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+                ax3.set_title('Соотношение обслуженных и отклоненных групп')
+            else:
+                ax3.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax3.transAxes)
+                ax3.set_title('Соотношение обслуженных и отклоненных групп')
+            
+            # График 4: Загрузка системы по типам
+            total_time = T * 60
+            game_time_pct = (results.total_game_time / total_time * 100) if total_time > 0 else 0
+            resurfacing_time_pct = (results.total_ice_resurfacing_time / total_time * 100) if total_time > 0 else 0
+            idle_time_pct = max(0, 100 - game_time_pct - resurfacing_time_pct)
+            
+            categories = ['Игры', 'Заливка', 'Простой']
+            values = [game_time_pct, resurfacing_time_pct, idle_time_pct]
+            colors_bar = ['#4CAF50', '#2196F3', '#E0E0E0']
+            bars = ax4.bar(categories, values, color=colors_bar, alpha=0.7)
+            ax4.set_ylabel('Процент времени (%)')
+            ax4.set_title('Распределение времени работы коробки')
+            ax4.set_ylim(0, 100)
+            ax4.grid(True, alpha=0.3)
+            
+            for bar, value in zip(bars, values):
+                height = bar.get_height()
+                ax4.text(bar.get_x() + bar.get_width()/2., height + 1,
+                        f'{value:.1f}%', ha='center', va='bottom')
+            
+            # График 5: Время ожидания заливочной машины
+            if hasattr(results, 'ice_resurfacing_wait_times') and results.ice_resurfacing_wait_times:
+                wait_times = results.ice_resurfacing_wait_times
+                ax5.hist(wait_times, bins=min(10, len(wait_times)), alpha=0.7, color='orange', edgecolor='black')
+                ax5.set_xlabel('Время ожидания (минуты)')
+                ax5.set_ylabel('Частота')
+                ax5.set_title('Время ожидания заливочной машины')
+                ax5.grid(True, alpha=0.3)
+                
+                if len(wait_times) > 0:
+                    avg_wait = np.mean(wait_times)
+                    ax5.axvline(avg_wait, color='red', linestyle='--', alpha=0.7, 
+                               label=f'Среднее: {avg_wait:.1f} мин')
+                    ax5.legend()
+            else:
+                ax5.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax5.transAxes)
+                ax5.set_title('Время ожидания заливочной машины')
+            
+            # График 6: Соотношение качества льда
+            bad_ice_pct = (results.bad_ice_time / total_time * 100) if total_time > 0 else 0
+            good_ice_pct = 100 - bad_ice_pct
+            
+            ice_labels = ['Хороший лед', 'Плохой лед']
+            ice_sizes = [good_ice_pct, bad_ice_pct]
+            ice_colors = ['#66bb6a', '#ef5350']
+            
+            if total_time > 0:
+                ax6.pie(ice_sizes, labels=ice_labels, colors=ice_colors, autopct='%1.1f%%', startangle=90)
+                ax6.set_title('Соотношение качества льда')
+            else:
+                ax6.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax6.transAxes)
+                ax6.set_title('Соотношение качества льда')
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            
+            # Расширенная статистика
+            if show_detailed_stats:
+                st.markdown("---")
+                st.subheader("📈 Детальная статистика")
+                
+                # Расчет дополнительных метрик
+                total_groups = results.served_groups + results.rejected_groups
+                rejection_rate = (results.rejected_groups / total_groups * 100) if total_groups > 0 else 0
+                avg_wait_time = results.total_wait_time / results.served_groups if results.served_groups > 0 else 0
+                efficiency = (results.served_groups / (T * 60)) * 60 if T > 0 else 0  # групп в час
+                
+                # Время работы разбитое по типам
+                total_time_min = T * 60
+                game_time_pct = (results.total_game_time / total_time_min * 100) if total_time_min > 0 else 0
+                resurfacing_time_pct = (results.total_ice_resurfacing_time / total_time_min * 100) if total_time_min > 0 else 0
+                idle_time_pct = max(0, 100 - game_time_pct - resurfacing_time_pct)
+                bad_ice_pct = (results.bad_ice_time / total_time_min * 100) if total_time_min > 0 else 0
+                
+                # Основные метрики - 3 колонки
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.markdown("**Основные показатели:**")
+                    basic_stats = {
+                        'Показатель': [
+                            'Общее время моделирования',
+                            'Всего поступило групп',
+                            'Обслуженных групп', 
+                            'Отклоненных групп',
+                            'Процент отказов',
+                            'Количество заливок'
+                        ],
+                        'Значение': [
+                            f"{T} часов ({T*60} минут)",
+                            f"{total_groups} групп",
+                            f"{results.served_groups} групп",
+                            f"{results.rejected_groups} групп", 
+                            f"{rejection_rate:.2f}%",
+                            f"{results.ice_resurfacing_count}"
+                        ]
+                    }
+                    st.table(pd.DataFrame(basic_stats))
                 
-                # Ступенчатый график длины очереди во времени
-                st.markdown("**Динамика длины очереди:**")
-                fig_queue, ax_queue = plt.subplots(figsize=(12, 4))
+                with col2:
+                    st.markdown("**Временные характеристики:**")
+                    time_stats = {
+                        'Показатель': [
+                            'Общее время игр',
+                            'Общее время заливки',
+                            'Общее время ожидания групп',
+                            'Время плохого льда',
+                            'Среднее время ожидания',
+                            'Среднее время игры'
+                        ],
+                        'Значение': [
+                            f"{results.total_game_time:.1f} мин ({game_time_pct:.1f}%)",
+                            f"{results.total_ice_resurfacing_time:.1f} мин ({resurfacing_time_pct:.1f}%)",
+                            f"{results.total_wait_time:.1f} мин", 
+                            f"{results.bad_ice_time:.1f} мин ({bad_ice_pct:.1f}%)",
+                            f"{avg_wait_time:.2f} мин",
+                            f"{results.total_game_time/results.served_groups:.1f} мин" if results.served_groups > 0 else "0 мин"
+                        ]
+                    }
+                    st.table(pd.DataFrame(time_stats))
                 
-                if hasattr(results, 'queue_times') and results.queue_times:
-                    # Для ступенчатого графика нужно отсортировать данные по времени
-                    times = results.queue_times
-                    lengths = results.queue_lengths
+                with col3:
+                    st.markdown("**Эффективность и загрузка:**")
+                    efficiency_stats = {
+                        'Показатель': [
+                            'Коэффициент загрузки',
+                            'Время простоя',
+                            'Производительность',
+                            'Интервал между заливками',
+                            'Время заливки',
+                            'Эффективность использования'
+                        ],
+                        'Значение': [
+                            f"{results.utilization:.2f}%",
+                            f"{idle_time_pct:.1f}%",
+                            f"{efficiency:.2f} групп/час",
+                            f"{S} часов",
+                            f"{L} минут",
+                            f"{(game_time_pct / (game_time_pct + resurfacing_time_pct) * 100):.1f}%" if (game_time_pct + resurfacing_time_pct) > 0 else "0%"
+                        ]
+                    }
+                    st.table(pd.DataFrame(efficiency_stats))
+                
+                # Статистика очереди
+                st.markdown("**Статистика очереди:**")
+                if hasattr(results, 'queue_lengths') and results.queue_lengths:
+                    queue_data = {
+                        'Метрика': [
+                            'Максимальная длина очереди',
+                            'Средняя длина очереди', 
+                            'Медианная длина очереди',
+                            'Время с пустой очередью',
+                            'Время с полной очередью',
+                            'Процент времени с очередью'
+                        ],
+                        'Значение': [
+                            f"{max(results.queue_lengths)} групп",
+                            f"{np.mean(results.queue_lengths):.2f} групп",
+                            f"{np.median(results.queue_lengths):.2f} групп",
+                            f"{(results.queue_lengths.count(0) / len(results.queue_lengths) * 100):.1f}%",
+                            f"{(results.queue_lengths.count(K) / len(results.queue_lengths) * 100):.1f}%",
+                            f"{100 - (results.queue_lengths.count(0) / len(results.queue_lengths) * 100):.1f}%"
+                        ]
+                    }
+                    st.table(pd.DataFrame(queue_data))
+                    
+                    # Ступенчатый график длины очереди во времени
+                    st.markdown("**Динамика длины очереди:**")
+                    fig_queue, ax_queue = plt.subplots(figsize=(12, 4))
                     
+                    if hasattr(results, 'queue_times') and results.queue_times:
+                        # Для ступенчатого графика нужно отсортировать данные по времени
+                        times = results.queue_times
+                        lengths = results.queue_lengths
+                        
+                        # Создаем ступенчатый график
+                        ax_queue.step(times, lengths, where='post', alpha=0.7, linewidth=1.5, color='#2196F3')
+                        ax_queue.fill_between(times, 0, lengths, step='post', alpha=0.3, color='#2196F3')
+                        
+                        # Добавляем среднюю линию
+                        if len(lengths) > 0:
+                            avg_length = np.mean(lengths)
+                            ax_queue.axhline(y=avg_length, color='red', linestyle='--', alpha=0.7, 
+                                           linewidth=1.5, label=f'Средняя: {avg_length:.2f} групп')
+                        
+                        # Добавляем максимальную линию
+                        max_length = max(lengths)
+                        ax_queue.axhline(y=max_length, color='orange', linestyle=':', alpha=0.5, 
+                                       linewidth=1, label=f'Максимум: {max_length} групп')
+                        
+                        # Добавляем линию вместимости очереди
+                        ax_queue.axhline(y=K, color='green', linestyle='-.', alpha=0.5, 
+                                       linewidth=1, label=f'Вместимость: {K} групп')
+                        
+                        ax_queue.set_xlabel('Время моделирования (минуты)')
+                        ax_queue.set_ylabel('Длина очереди (групп)')
+                        ax_queue.set_title('Изменение длины очереди во времени (ступенчатый график)')
+                        ax_queue.grid(True, alpha=0.3)
+                        ax_queue.set_ylim(bottom=0, top=max(max_length + 1, K + 1))
+                        ax_queue.legend(loc='upper right')
+                        ax_queue.set_xlim(left=0)
+                    
+                    st.pyplot(fig_queue)
+            
+            # График качества льда во времени (ступенчатый)
+            if show_ice_quality and hasattr(results, 'ice_quality_times') and results.ice_quality_times:
+                st.markdown("---")
+                st.subheader("📈 Динамика качества льда во времени")
+                
+                # Подготовка данных для ступенчатого графика
+                times = [t for t, q in results.ice_quality_times]
+                qualities = [q for t, q in results.ice_quality_times]
+                
+                # Создаем ступенчатый график
+                fig_ice, ax_ice = plt.subplots(figsize=(12, 4))
+                
+                if len(times) > 1:
                     # Создаем ступенчатый график
-                    ax_queue.step(times, lengths, where='post', alpha=0.7, linewidth=1.5, color='#2196F3')
-                    ax_queue.fill_between(times, 0, lengths, step='post', alpha=0.3, color='#2196F3')
+                    ax_ice.step(times, qualities, where='post', alpha=0.7, linewidth=1.5, color='purple')
+                    ax_ice.fill_between(times, 0, qualities, step='post', alpha=0.3, color='purple')
                     
-                    # Добавляем среднюю линию
-                    if len(lengths) > 0:
-                        avg_length = np.mean(lengths)
-                        ax_queue.axhline(y=avg_length, color='red', linestyle='--', alpha=0.7, 
-                                       linewidth=1.5, label=f'Средняя: {avg_length:.2f} групп')
+                    # Рассчитываем среднее качество льда
+                    avg_quality = np.mean(qualities)
+                    ax_ice.axhline(y=avg_quality, color='blue', linestyle='--', alpha=0.7, 
+                                 linewidth=1.5, label=f'Среднее: {avg_quality:.3f}')
                     
-                    # Добавляем максимальную линию
-                    max_length = max(lengths)
-                    ax_queue.axhline(y=max_length, color='orange', linestyle=':', alpha=0.5, 
-                                   linewidth=1, label=f'Максимум: {max_length} групп')
+                    # Рассчитываем медианное качество льда
+                    median_quality = np.median(qualities)
+                    ax_ice.axhline(y=median_quality, color='cyan', linestyle='-.', alpha=0.7, 
+                                 linewidth=1, label=f'Медиана: {median_quality:.3f}')
                     
-                    # Добавляем линию вместимости очереди
-                    ax_queue.axhline(y=K, color='green', linestyle='-.', alpha=0.5, 
-                                   linewidth=1, label=f'Вместимость: {K} групп')
+                    # Добавим горизонтальные линии для порогов
+                    ax_ice.axhline(y=0.5, color='r', linestyle='--', alpha=0.5, 
+                                 linewidth=1, label='Порог "плохого" льда (0.5)')
+                    ax_ice.axhline(y=0.8, color='y', linestyle='--', alpha=0.5, 
+                                 linewidth=1, label='Хороший лед (0.8)')
                     
-                    ax_queue.set_xlabel('Время моделирования (минуты)')
-                    ax_queue.set_ylabel('Длина очереди (групп)')
-                    ax_queue.set_title('Изменение длины очереди во времени (ступенчатый график)')
-                    ax_queue.grid(True, alpha=0.3)
-                    ax_queue.set_ylim(bottom=0, top=max(max_length + 1, K + 1))
-                    ax_queue.legend(loc='upper right')
-                    ax_queue.set_xlim(left=0)
+                    # Рассчитываем процент времени с плохим льдом
+                    bad_ice_count = sum(1 for q in qualities if q < 0.5)
+                    bad_ice_percent = (bad_ice_count / len(qualities)) * 100
+                    
+                    # Добавляем информационный текст
+                    info_text = f'Время с плохим льдом (<0.5): {bad_ice_percent:.1f}%'
+                    ax_ice.text(0.02, 0.02, info_text, transform=ax_ice.transAxes, 
+                              bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+                    
+                    ax_ice.set_xlabel('Время моделирования (минуты)')
+                    ax_ice.set_ylabel('Качество льда (0-1)')
+                    ax_ice.set_title('Изменение качества льда во времени (ступенчатый график)')
+                    ax_ice.grid(True, alpha=0.3)
+                    ax_ice.set_ylim(0, 1.1)
+                    ax_ice.set_xlim(left=0)
+                    ax_ice.legend(loc='upper right')
+                    
+                    # Добавляем вертикальные линии для заливок льда (если есть информация)
+                    if hasattr(results, 'ice_resurfacing_wait_times') and results.ice_resurfacing_wait_times:
+                        # Это упрощенный подход - отметим примерное время заливок
+                        resurfacing_interval = S * 60
+                        for i in range(results.ice_resurfacing_count):
+                            resurfacing_time = (i + 1) * resurfacing_interval
+                            if resurfacing_time <= max(times):
+                                ax_ice.axvline(x=resurfacing_time, color='green', linestyle=':', 
+                                             alpha=0.3, linewidth=0.8)
                 
-                st.pyplot(fig_queue)
-        
-        # График качества льда во времени (ступенчатый)
-        if show_ice_quality and hasattr(results, 'ice_quality_times') and results.ice_quality_times:
+                st.pyplot(fig_ice)
+            
+            # Логи моделирования
+            if show_logs:
+                st.markdown("---")
+                st.subheader("📋 Логи моделирования")
+                
+                # Создаем расширяемую область для логов
+                with st.expander("Показать логи выполнения", expanded=False):
+                    st.text_area("Логи:", logs, height=300)
+            
+            # Схема процесса
             st.markdown("---")
-            st.subheader("📈 Динамика качества льда во времени")
+            st.subheader("📋 Структурная схема процесса")
             
-            # Подготовка данных для ступенчатого графика
-            times = [t for t, q in results.ice_quality_times]
-            qualities = [q for t, q in results.ice_quality_times]
+            try:
+                st.image("структурная схема модели.drawio.png", 
+                        caption="Структурная схема процесса функционирования хоккейной коробки",
+                        use_container_width=True)
+            except:
+                st.warning("Файл со схемой не найден. Убедитесь, что файл 'структурная схема модели.drawio.png' находится в той же папке.")
+
+        else:
+            # Сообщение перед запуском
+            st.info("👈 Задайте параметры в боковой панели и нажмите кнопку 'Запустить моделирования'")
             
-            # Создаем ступенчатый график
-            fig_ice, ax_ice = plt.subplots(figsize=(12, 4))
+            # Показываем схему процесса до запуска
+            try:
+                st.image("структурная схема модели.drawio.png", 
+                        caption="Структурная схема процесса функционирования хоккейной коробки",
+                        use_container_width=True)
+            except:
+                st.warning("Файл со схемой не найден. Убедитесь, что файл 'структурная схема модели.drawio.png' находится в той же папке.")
             
-            if len(times) > 1:
-                # Создаем ступенчатый график
-                ax_ice.step(times, qualities, where='post', alpha=0.7, linewidth=1.5, color='purple')
-                ax_ice.fill_between(times, 0, qualities, step='post', alpha=0.3, color='purple')
-                
-                # Рассчитываем среднее качество льда
-                avg_quality = np.mean(qualities)
-                ax_ice.axhline(y=avg_quality, color='blue', linestyle='--', alpha=0.7, 
-                             linewidth=1.5, label=f'Среднее: {avg_quality:.3f}')
-                
-                # Рассчитываем медианное качество льда
-                median_quality = np.median(qualities)
-                ax_ice.axhline(y=median_quality, color='cyan', linestyle='-.', alpha=0.7, 
-                             linewidth=1, label=f'Медиана: {median_quality:.3f}')
-                
-                # Добавим горизонтальные линии для порогов
-                ax_ice.axhline(y=0.5, color='r', linestyle='--', alpha=0.5, 
-                             linewidth=1, label='Порог "плохого" льда (0.5)')
-                ax_ice.axhline(y=0.8, color='y', linestyle='--', alpha=0.5, 
-                             linewidth=1, label='Хороший лед (0.8)')
-                
-                # Рассчитываем процент времени с плохим льдом
-                bad_ice_count = sum(1 for q in qualities if q < 0.5)
-                bad_ice_percent = (bad_ice_count / len(qualities)) * 100
-                
-                # Добавляем информационный текст
-                info_text = f'Время с плохим льдом (<0.5): {bad_ice_percent:.1f}%'
-                ax_ice.text(0.02, 0.02, info_text, transform=ax_ice.transAxes, 
-                          bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-                
-                ax_ice.set_xlabel('Время моделирования (минуты)')
-                ax_ice.set_ylabel('Качество льда (0-1)')
-                ax_ice.set_title('Изменение качества льда во времени (ступенчатый график)')
-                ax_ice.grid(True, alpha=0.3)
-                ax_ice.set_ylim(0, 1.1)
-                ax_ice.set_xlim(left=0)
-                ax_ice.legend(loc='upper right')
-                
-                # Добавляем вертикальные линии для заливок льда (если есть информация)
-                if hasattr(results, 'ice_resurfacing_wait_times') and results.ice_resurfacing_wait_times:
-                    # Это упрощенный подход - отметим примерное время заливок
-                    resurfacing_interval = S * 60
-                    for i in range(results.ice_resurfacing_count):
-                        resurfacing_time = (i + 1) * resurfacing_interval
-                        if resurfacing_time <= max(times):
-                            ax_ice.axvline(x=resurfacing_time, color='green', linestyle=':', 
-                                         alpha=0.3, linewidth=0.8)
-            
-            st.pyplot(fig_ice)
-        
-        # Логи моделирования
-        if show_logs:
+            # Информация о параметрах по умолчанию
             st.markdown("---")
-            st.subheader("📋 Логи моделирования")
+            st.subheader("ℹ️ О параметрах моделирования")
             
-            # Создаем расширяемую область для логов
-            with st.expander("Показать логи выполнения", expanded=False):
-                st.text_area("Логи:", logs, height=300)
-        
-        # Схема процесса
-        st.markdown("---")
-        st.subheader("📋 Структурная схема процесса")
-        
-        try:
-            st.image("структурная схема модели.drawio.png", 
-                    caption="Структурная схема процесса функционирования хоккейной коробки",
-                    use_container_width=True)
-        except:
-            st.warning("Файл со схемой не найден. Убедитесь, что файл 'структурная схема модели.drawio.png' находится в той же папке.")
+            param_info = {
+                'Параметр': ['N', 'M', 'A', 'B', 'K', 'T', 'S', 'L'],
+                'Описание': [
+                    'Среднее время между приходом групп (минуты)',
+                    'Разброс времени прихода групп (минуты)',
+                    'Среднее время игры (минуты)',
+                    'Разброс времени игры (минуты)',
+                    'Максимальный размер очереди (групп)',
+                    'Время моделирования (часы)',
+                    'Интервал между заливками льда (часы)',
+                    'Время заливки льда (минуты)'
+                ],
+                'Ограничения': [
+                    'N ≥ M, N > 0',
+                    '0 ≤ M ≤ N',
+                    'A ≥ B, A > 0',
+                    '0 ≤ B ≤ A',
+                    'K > 0',
+                    'T > 0',
+                    'S > 0',
+                    'L > 0'
+                ]
+            }
+            st.table(pd.DataFrame(param_info))
+
+
+# Вкладка сравнения: все сочетания значений K и S при остальных параметрах из боковой панели
+METRIC_LABELS = {
+    'rejection_rate': 'Отказы, %',
+    'utilization': 'Загрузка, %',
+    'bad_ice_percent': 'Плохой лед, %',
+    'avg_wait': 'Ожидание, мин',
+}
 
+with tab_compare:
+    st.subheader("⚖️ Сравнение сценариев")
+    st.caption("Остальные параметры берутся из боковой панели. Прогон с одним номером во всех сценариях "
+               "использует одно и то же зерно (общие случайные числа), поэтому разности показателей "
+               "оцениваются точнее, чем по независимым прогонам")
+
+    col1, col2, col3 = st.columns(3)
+    k_text = col1.text_input("Значения K (через запятую)", "3, 5, 8")
+    s_text = col2.text_input("Значения S, часы (через запятую)", "1.5, 2, 3")
+    replications = col3.number_input("Прогонов на сценарий", min_value=2, max_value=100, value=10)
+
+    grid_error = None
+    try:
+        grid = {'K': parse_values(k_text, int), 'S': parse_values(s_text)}
+        if not grid['K'] or not grid['S'] or min(grid['K']) <= 0 or min(grid['S']) <= 0:
+            grid_error = "❌ Ошибка: Значения K и S должны быть положительными"
+    except ValueError:
+        grid_error = "❌ Ошибка: Значения K (целые) и S нужно перечислить через запятую"
+
+    if grid_error:
+        st.error(grid_error)
+    elif validation_errors:
+        st.warning("Исправьте ошибки в параметрах на боковой панели")
     else:
-        # Сообщение перед запуском
-        st.info("👈 Задайте параметры в боковой панели и нажмите кнопку 'Запустить моделирования'")
-        
-        # Показываем схему процесса до запуска
-        try:
-            st.image("структурная схема модели.drawio.png", 
-                    caption="Структурная схема процесса функционирования хоккейной коробки",
-                    use_container_width=True)
-        except:
-            st.warning("Файл со схемой не найден. Убедитесь, что файл 'структурная схема модели.drawio.png' находится в той же папке.")
-        
-        # Информация о параметрах по умолчанию
-        st.markdown("---")
-        st.subheader("ℹ️ О параметрах моделирования")
-        
-        param_info = {
-            'Параметр': ['N', 'M', 'A', 'B', 'K', 'T', 'S', 'L'],
-            'Описание': [
-                'Среднее время между приходом групп (минуты)',
-                'Разброс времени прихода групп (минуты)',
-                'Среднее время игры (минуты)',
-                'Разброс времени игры (минуты)',
-                'Максимальный размер очереди (групп)',
-                'Время моделирования (часы)',
-                'Интервал между заливками льда (часы)',
-                'Время заливки льда (минуты)'
-            ],
-            'Ограничения': [
-                'N ≥ M, N > 0',
-                '0 ≤ M ≤ N',
-                'A ≥ B, A > 0',
-                '0 ≤ B ≤ A',
-                'K > 0',
-                'T > 0',
-                'S > 0',
-                'L > 0'
-            ]
-        }
-        st.table(pd.DataFrame(param_info))
+        base_params = {'N': N, 'M': M, 'A': A, 'B': B, 'K': K, 'T': T, 'S': S, 'L': L,
+                       'arrival_dist': make_spec(arrival_kind, N, M),
+                       'game_dist': make_spec(game_kind, A, B)}
+        scenarios = build_scenarios(base_params, grid)
+        labels = [label for label, _ in scenarios]
+        baseline = st.selectbox("Базовый сценарий для разностей", labels)
+
+        if st.button("🚀 Сравнить сценарии", type="primary"):
+            # Области страницы, которые обновляются по мере готовности сценариев
+            progress = st.progress(0.0)
+            st.markdown("**Показатели сценариев (среднее ± полуширина 95% интервала):**")
+            metrics_placeholder = st.empty()
+            st.markdown(f"**Парные разности относительно сценария {baseline} (95% интервал, ✱ — значимо):**")
+            differences_placeholder = st.empty()
+            charts_placeholder = st.empty()
+
+            colors = {label: plt.cm.tab10(i % 10) for i, label in enumerate(labels)}
+            finished = {}
+            with ResultsStore(RESULTS_DB) as store:
+                for label, params, seeds, summaries, series in run_scenarios(scenarios, replications, seed or None, engine):
+                    finished[label] = (summaries, series)
+                    for r, (run_seed, summary) in enumerate(zip(seeds, summaries)):
+                        store.add(dict(params, seed=run_seed), summary, engine, series if r == 0 else None)
+                    store.flush()
+
+                    done = [name for name in labels if name in finished]
+                    progress.progress(len(done) / len(labels), text=f"Готово сценариев: {len(done)} из {len(labels)}")
+
+                    # Таблица показателей
+                    metrics_table = []
+                    for name in done:
+                        intervals = metric_intervals(finished[name][0])
+                        metrics_table.append({'Сценарий': name, **{
+                            METRIC_LABELS[metric]: f"{mean:.2f} ± {half_width:.2f}"
+                            for metric, (mean, half_width) in intervals.items()}})
+                    metrics_placeholder.dataframe(pd.DataFrame(metrics_table), use_container_width=True, hide_index=True)
+
+                    # Парные разности (как только готов базовый сценарий)
+                    if baseline in finished:
+                        differences_table = []
+                        for name in done:
+                            if name == baseline:
+                                continue
+                            differences = paired_differences(finished[baseline][0], finished[name][0])
+                            row = {'Сценарий': name}
+                            for metric, values in differences.items():
+                                low, high = values['confidence_interval']
+                                mark = " ✱" if values['significant'] else ""
+                                row[METRIC_LABELS[metric]] = f"{values['difference']:+.2f} [{low:+.2f}; {high:+.2f}]{mark}"
+                            differences_table.append(row)
+                        if differences_table:
+                            differences_placeholder.dataframe(pd.DataFrame(differences_table), use_container_width=True, hide_index=True)
+                    else:
+                        differences_placeholder.info(f"Ожидаем завершения базового сценария {baseline}")
+
+                    # Наложенные графики очереди и качества льда (первый прогон каждого сценария)
+                    fig_compare, (ax_queue, ax_ice) = plt.subplots(1, 2, figsize=(18, 5))
+                    for name in done:
+                        name_series = finished[name][1]
+                        ax_queue.step(name_series['queue_times'], name_series['queue_lengths'], where='post',
+                                      alpha=0.7, linewidth=1.2, color=colors[name], label=name)
+                        ax_ice.step(name_series['ice_quality_times'], name_series['ice_quality'], where='post',
+                                    alpha=0.7, linewidth=1.2, color=colors[name], label=name)
+                    ax_queue.set_xlabel('Время моделирования (минуты)')
+                    ax_queue.set_ylabel('Длина очереди (групп)')
+                    ax_queue.set_title('Длина очереди во времени')
+                    ax_queue.grid(True, alpha=0.3)
+                    ax_queue.set_xlim(left=0)
+                    ax_queue.legend(loc='upper right', fontsize='small')
+                    ax_ice.axhline(y=0.5, color='r', linestyle='--', alpha=0.5)
+                    ax_ice.set_xlabel('Время моделирования (минуты)')
+                    ax_ice.set_ylabel('Качество льда (0-1)')
+                    ax_ice.set_title('Качество льда во времени')
+                    ax_ice.set_ylim(0, 1.1)
+                    ax_ice.set_xlim(left=0)
+                    ax_ice.grid(True, alpha=0.3)
+                    ax_ice.legend(loc='lower right', fontsize='small')
+                    plt.tight_layout()
+                    charts_placeholder.pyplot(fig_compare)
+                    plt.close(fig_compare)
+
+
+# Вкладка истории: сохраненные запуски с фильтрами по диапазонам параметров
+with tab_history:
+    with ResultsStore(RESULTS_DB) as store:
+        bounds = store.parameter_bounds()
+        if not bounds:
+            st.info("История пуста: результаты появятся здесь после первого запуска моделирования")
+        else:
+            st.subheader("🗂️ История запусков")
+            st.caption(f"Всего сохранено результатов: {store.count()} (база: {RESULTS_DB})")
+
+            # Фильтры только по параметрам, которые в истории принимают разные значения
+            ranges = {}
+            varying = [name for name in PARAM_COLUMNS if bounds[name][0] is not None and bounds[name][0] < bounds[name][1]]
+            filter_columns = st.columns(4)
+            for i, name in enumerate(varying):
+                low, high = bounds[name]
+                with filter_columns[i % 4]:
+                    ranges[name] = st.slider(name, float(low), float(high), (float(low), float(high)), key=f"history_{name}")
+            engine_filter = st.selectbox("Ядро моделирования", ["все"] + list(ENGINES), key="history_engine")
+            rows = store.query(ranges, None if engine_filter == "все" else engine_filter)
+
+            if not rows:
+                st.warning("Нет результатов в выбранных диапазонах параметров")
+            else:
+                history_table = pd.DataFrame(rows)
+                history_table['created_at'] = pd.to_datetime(history_table['created_at'], unit='s')
+                st.dataframe(history_table, use_container_width=True, hide_index=True)
+
+                # Подробности выбранного запуска
+                result_id = st.selectbox("Запуск для просмотра", [row['id'] for row in rows], key="history_result")
+                row = next(row for row in rows if row['id'] == result_id)
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Обслуженных групп", int(row['served_groups']))
+                col2.metric("Процент отказов", f"{row['rejection_rate']:.1f}%")
+                col3.metric("Загрузка коробки", f"{row['utilization']:.1f}%")
+                col4.metric("Плохой лед", f"{row['bad_ice_percent']:.1f}%")
+
+                series = store.load_series(result_id)
+                if series:
+                    fig_history, (ax_queue, ax_ice) = plt.subplots(1, 2, figsize=(18, 4))
+                    if len(series['queue_times']):
+                        ax_queue.step(series['queue_times'], series['queue_lengths'], where='post', color='#2196F3')
+                    ax_queue.axhline(y=row['K'], color='green', linestyle='-.', alpha=0.5,
+                                     label=f"Вместимость: {row['K']:.0f} групп")
+                    ax_queue.set_xlabel('Время моделирования (минуты)')
+                    ax_queue.set_ylabel('Длина очереди (групп)')
+                    ax_queue.set_title('Изменение длины очереди во времени')
+                    ax_queue.grid(True, alpha=0.3)
+                    ax_queue.legend(loc='upper right')
+                    if len(series['ice_quality_times']):
+                        ax_ice.step(series['ice_quality_times'], series['ice_quality'], where='post', color='purple')
+                    ax_ice.axhline(y=0.5, color='r', linestyle='--', alpha=0.5, label='Порог "плохого" льда (0.5)')
+                    ax_ice.set_xlabel('Время моделирования (минуты)')
+                    ax_ice.set_ylabel('Качество льда (0-1)')
+                    ax_ice.set_title('Изменение качества льда во времени')
+                    ax_ice.set_ylim(0, 1.1)
+                    ax_ice.grid(True, alpha=0.3)
+                    ax_ice.legend(loc='upper right')
+                    plt.tight_layout()
+                    st.pyplot(fig_history)
+                else:
+                    st.info("Для этого запуска временные ряды не сохранялись")
 
 # Подвал приложения
 st.markdown("---")
@@ -0,0 +1,30 @@
+# benchmark.py
+# Сравнение производительности ядер моделирования (событий прихода в секунду)
+import sys
+
+from model import ENGINES, run_simulation
+
+
+def benchmark_engines(params, repeats=3):
+    params = dict(params, verbose=False, record_series=False)
+    results = {}
+    for engine in ENGINES:
+        rates = []
+        for repeat in range(repeats):
+            stats = run_simulation(dict(params, seed=repeat), engine=engine)
+            rates.append(stats.events_per_sec)
+        results[engine] = max(rates)
+    return results
+
+
+if __name__ == "__main__":
+    # Пример: python benchmark.py 1000  (время моделирования в часах)
+    params = {
+        'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'S': 2, 'L': 30,
+        'T': float(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+    }
+    results = benchmark_engines(params)
+    baseline = results['simpy']
+    print(f"Время моделирования: {params['T']} час.")
+    for engine, rate in results.items():
+        print(f"{engine:>6}: {rate:12.0f} событий/с (x{rate / baseline:.1f})")
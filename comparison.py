@@ -0,0 +1,132 @@
+# comparison.py
+# Сравнение сценариев (наборов параметров) с общими случайными числами: прогон r каждого
+# сценария использует одно и то же зерно, поэтому приходы групп, время игр и интервалы
+# заливки совпадают, и разница показателей отражает сами параметры, а не случайный шум.
+# Сценарии считаются параллельно в пуле процессов и возвращаются по мере готовности
+import itertools
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from distributions import design_seeds
+from model import run_simulation, summarize
+from results_store import series_from_stats
+
+# Показатели, по которым сравниваются сценарии
+COMPARED_METRICS = ('rejection_rate', 'utilization', 'bad_ice_percent', 'avg_wait')
+
+# Квантили распределения Стьюдента для 95% интервала (по числу степеней свободы);
+# при большем числе степеней свободы - разложение Корниша-Фишера от нормального квантиля
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+Z_95 = 1.959963984540054
+
+
+def t_quantile(df):
+    if df <= len(T_95):
+        return T_95[df - 1]
+    z = Z_95
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4))
+
+
+# Список значений из строки вида "3, 5, 8"
+def parse_values(text, cast=float):
+    return [cast(value) for value in text.replace(';', ',').split(',') if value.strip()]
+
+
+# Все сочетания значений параметров: grid = {'K': [3, 5, 8], 'S': [1.5, 2, 3]}.
+# Возвращает список пар (название сценария, параметры)
+def build_scenarios(base_params, grid):
+    names = list(grid)
+    scenarios = []
+    for values in itertools.product(*grid.values()):
+        label = ', '.join(f"{name}={value:g}" for name, value in zip(names, values))
+        scenarios.append((label, dict(base_params, **dict(zip(names, values)))))
+    return scenarios
+
+
+# Все прогоны одного сценария (выполняется в отдельном процессе); временные ряды
+# сохраняются только для первого прогона - их хватает для графиков
+def _run_scenario(task):
+    params, seeds, engine = task
+    summaries, series = [], None
+    for r, seed in enumerate(seeds):
+        stats = run_simulation(dict(params, seed=seed, verbose=False, record_series=(r == 0)), engine=engine)
+        summaries.append(summarize(stats, params))
+        if r == 0:
+            series = series_from_stats(stats)
+    return summaries, series
+
+
+# Параллельный расчет сценариев: генератор выдает (название, параметры, зерна, сводки прогонов,
+# ряды первого прогона) по мере завершения сценариев, а не в порядке списка
+def run_scenarios(scenarios, replications=10, seed=0, engine='heap', max_workers=None):
+    seeds = design_seeds(seed, replications)
+    workers = min(max_workers or os.cpu_count() or 1, len(scenarios)) or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_scenario, (params, seeds, engine)): (label, params)
+                   for label, params in scenarios}
+        for future in as_completed(futures):
+            label, params = futures[future]
+            summaries, series = future.result()
+            yield label, params, seeds, summaries, series
+
+
+# Среднее по прогонам и полуширина 95% интервала для каждого показателя
+def metric_intervals(summaries, metrics=COMPARED_METRICS):
+    result = {}
+    for metric in metrics:
+        values = np.array([summary[metric] for summary in summaries], dtype=float)
+        half_width = (t_quantile(values.size - 1) * values.std(ddof=1) / math.sqrt(values.size)
+                      if values.size > 1 else math.inf)
+        result[metric] = (float(values.mean()), float(half_width))
+    return result
+
+
+# Парные разности "сценарий минус базовый" по прогонам с общими зернами и их 95% интервалы.
+# Интервал, не содержащий нуля, означает значимое различие сценариев
+def paired_differences(baseline, summaries, metrics=COMPARED_METRICS):
+    differences = [{metric: other[metric] - base[metric] for metric in metrics}
+                   for base, other in zip(baseline, summaries)]
+    result = {}
+    for metric, (mean, half_width) in metric_intervals(differences, metrics).items():
+        result[metric] = {
+            'difference': mean,
+            'confidence_interval': (mean - half_width, mean + half_width),
+            'significant': not (mean - half_width <= 0 <= mean + half_width),
+        }
+    return result
+
+
+if __name__ == "__main__":
+    # Пример: python comparison.py "3, 5, 8" "1.5, 2, 3" 10  (значения K, S и число прогонов)
+    base_params = {'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'T': 100, 'S': 2, 'L': 30}
+    grid = {
+        'K': parse_values(sys.argv[1] if len(sys.argv) > 1 else "3, 5, 8", int),
+        'S': parse_values(sys.argv[2] if len(sys.argv) > 2 else "1.5, 2, 3"),
+    }
+    replications = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    scenarios = build_scenarios(base_params, grid)
+    results = {}
+    for label, params, seeds, summaries, series in run_scenarios(scenarios, replications):
+        results[label] = summaries
+        line = ', '.join(f"{metric}={mean:.2f}±{half_width:.2f}"
+                         for metric, (mean, half_width) in metric_intervals(summaries).items())
+        print(f"Готов сценарий {label}: {line}")
+
+    baseline = scenarios[0][0]
+    print(f"\nРазности относительно сценария {baseline} (95% интервалы):")
+    for label, _ in scenarios[1:]:
+        differences = paired_differences(results[baseline], results[label])
+        line = ', '.join(f"{metric}={values['difference']:+.2f} "
+                         f"[{values['confidence_interval'][0]:+.2f}; {values['confidence_interval'][1]:+.2f}]"
+                         f"{'*' if values['significant'] else ''}"
+                         for metric, values in differences.items())
+        print(f"  {label}: {line}")
@@ -0,0 +1,275 @@
+# distributions.py
+# Распределения случайных величин модели и буферизованная генерация значений
+import numpy as np
+
+# Размер блока, который генерируется за одно обращение к NumPy
+BLOCK_SIZE = 4096
+
+# Минимально допустимое значение длительности (защита от нулевых и отрицательных значений)
+MIN_VALUE = 0.1
+
+
+# Равномерное распределение на отрезке [low, high]
+class Uniform:
+    def __init__(self, low, high):
+        if high < low:
+            raise ValueError(f"Верхняя граница ({high}) меньше нижней ({low})")
+        self.low = float(low)
+        self.high = float(high)
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+    def mean(self):
+        return (self.low + self.high) / 2
+
+    # Отрезок нулевой ширины - постоянное значение, сдвигать нечего
+    @property
+    def degenerate(self):
+        return self.high == self.low
+
+    def logpdf(self, x):
+        inside = (x >= self.low) & (x <= self.high)
+        if self.degenerate:
+            return np.where(inside, 0.0, -np.inf)
+        return np.where(inside, -np.log(self.high - self.low), -np.inf)
+
+    # Экспоненциальный сдвиг: strength > 0 смещает значения к верхней границе, < 0 - к нижней
+    def tilt(self, strength):
+        if self.degenerate:
+            raise ValueError(f"Равномерное распределение нулевой ширины ({self.low}) нельзя сдвинуть")
+        return TiltedUniform(self.low, self.high, strength / (self.high - self.low))
+
+
+# Равномерное распределение с экспоненциальным наклоном: плотность ~ exp(theta * x) на [low, high]
+class TiltedUniform:
+    def __init__(self, low, high, theta):
+        self.low = float(low)
+        self.high = float(high)
+        self.theta = float(theta)
+
+    def sample(self, rng, size):
+        u = rng.random(size)
+        if self.theta == 0:
+            return self.low + u * (self.high - self.low)
+        return self.low + np.log1p(u * np.expm1(self.theta * (self.high - self.low))) / self.theta
+
+    def mean(self):
+        width = self.high - self.low
+        if self.theta == 0:
+            return self.low + width / 2
+        return self.low + width / -np.expm1(-self.theta * width) - 1 / self.theta
+
+    def logpdf(self, x):
+        width = self.high - self.low
+        inside = (x >= self.low) & (x <= self.high)
+        if self.theta == 0:
+            return np.where(inside, -np.log(width), -np.inf)
+        log_norm = np.log(self.theta / np.expm1(self.theta * width))
+        return np.where(inside, log_norm + self.theta * (x - self.low), -np.inf)
+
+
+# Экспоненциальное распределение с заданным средним
+class Exponential:
+    def __init__(self, mean):
+        if mean <= 0:
+            raise ValueError(f"Среднее экспоненциального распределения должно быть положительным ({mean})")
+        self._mean = float(mean)
+
+    def sample(self, rng, size):
+        return rng.exponential(self._mean, size)
+
+    def mean(self):
+        return self._mean
+
+    def logpdf(self, x):
+        return np.where(x >= 0, -np.log(self._mean) - x / self._mean, -np.inf)
+
+    # Экспоненциальный сдвиг внутри семейства: среднее умножается на exp(strength)
+    def tilt(self, strength):
+        return Exponential(self._mean * np.exp(strength))
+
+
+# Логнормальное распределение, заданное средним и стандартным отклонением самой величины
+class Lognormal:
+    def __init__(self, mean, std):
+        if mean <= 0 or std < 0:
+            raise ValueError(f"Некорректные параметры логнормального распределения: mean={mean}, std={std}")
+        self._mean = float(mean)
+        self.std = float(std)
+        # Пересчет в параметры нормального распределения логарифма
+        self.sigma = float(np.sqrt(np.log(1.0 + (self.std / self._mean) ** 2)))
+        self.mu = float(np.log(self._mean) - self.sigma ** 2 / 2)
+
+    def sample(self, rng, size):
+        return rng.lognormal(self.mu, self.sigma, size)
+
+    def mean(self):
+        return self._mean
+
+    # При нулевом разбросе величина постоянна, сдвигать нечего
+    @property
+    def degenerate(self):
+        return self.sigma == 0
+
+    def logpdf(self, x):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_x = np.log(x)
+            density = -log_x - np.log(self.sigma * np.sqrt(2 * np.pi)) - (log_x - self.mu) ** 2 / (2 * self.sigma ** 2)
+        return np.where(x > 0, density, -np.inf)
+
+    # Сдвиг логарифма на strength стандартных отклонений (коэффициент вариации не меняется)
+    def tilt(self, strength):
+        scale = np.exp(strength * self.sigma)
+        return Lognormal(self._mean * scale, self.std * scale)
+
+
+# Эмпирическое распределение: выборка с возвращением из наблюденных значений
+class Empirical:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=float)
+        if self.values.size == 0:
+            raise ValueError("Эмпирическое распределение требует хотя бы одно значение")
+
+    def sample(self, rng, size):
+        return rng.choice(self.values, size)
+
+    def mean(self):
+        return float(self.values.mean())
+
+
+# Гистограмма: выбор интервала по частотам и равномерное значение внутри интервала
+class Histogram:
+    def __init__(self, edges, counts):
+        self.edges = np.asarray(edges, dtype=float)
+        counts = np.asarray(counts, dtype=float)
+        if self.edges.size != counts.size + 1:
+            raise ValueError("Количество границ гистограммы должно быть на 1 больше количества интервалов")
+        if counts.sum() <= 0:
+            raise ValueError("Гистограмма не содержит наблюдений")
+        self.probs = counts / counts.sum()
+
+    @classmethod
+    def fit(cls, data, bins='auto'):
+        # Подгонка гистограммы по реальным данным (например, по журналу бронирований)
+        counts, edges = np.histogram(np.asarray(data, dtype=float), bins=bins)
+        return cls(edges, counts)
+
+    def sample(self, rng, size):
+        idx = rng.choice(self.probs.size, size, p=self.probs)
+        return rng.uniform(self.edges[idx], self.edges[idx + 1])
+
+    def mean(self):
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        return float((centers * self.probs).sum())
+
+
+# Вырожденное распределение (постоянное значение)
+class Constant:
+    degenerate = True  # сдвигать нечего, как у равномерного распределения нулевой ширины
+
+    def __init__(self, value):
+        self.value = float(value)
+
+    def sample(self, rng, size):
+        return np.full(size, self.value)
+
+    def mean(self):
+        return self.value
+
+
+# Реестр распределений для описания через словарь: {'kind': 'exponential', 'mean': 5}
+DISTRIBUTIONS = {
+    'uniform': Uniform,
+    'exponential': Exponential,
+    'lognormal': Lognormal,
+    'empirical': Empirical,
+    'histogram': Histogram,
+    'constant': Constant,
+    'tilted_uniform': TiltedUniform,
+}
+
+
+def make_distribution(spec):
+    # Спецификация может быть готовым объектом распределения или словарем
+    if isinstance(spec, dict):
+        spec = dict(spec)
+        kind = spec.pop('kind')
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(f"Неизвестное распределение: {kind}")
+        return DISTRIBUTIONS[kind](**spec)
+    if not hasattr(spec, 'sample'):
+        raise TypeError(f"Объект {spec!r} не является распределением")
+    return spec
+
+
+# Поток случайных значений: генерирует блоки через NumPy и выдает по одному из буфера
+class VariateStream:
+    def __init__(self, distribution, rng, block_size=BLOCK_SIZE, min_value=MIN_VALUE):
+        self.distribution = distribution
+        self.rng = rng
+        self.block_size = block_size
+        self.min_value = min_value
+        self._buffer = []
+        self._pos = 0
+
+    def _refill(self):
+        block = self.distribution.sample(self.rng, self.block_size)
+        # Защита от отрицательных и слишком малых значений
+        self._buffer = np.maximum(block, self.min_value).tolist()
+        self._pos = 0
+
+    def __call__(self):
+        if self._pos >= len(self._buffer):
+            self._refill()
+        value = self._buffer[self._pos]
+        self._pos += 1
+        return value
+
+
+# Распределения по умолчанию повторяют исходную модель: N±M, A±B, постоянные S и L
+def default_distributions(params):
+    return {
+        'arrival': Uniform(max(MIN_VALUE, params['N'] - params['M']), params['N'] + params['M']),
+        'game': Uniform(max(MIN_VALUE, params['A'] - params['B']), params['A'] + params['B']),
+        'resurfacing': Constant(params['L']),
+        'interval': Constant(params['S'] * 60),  # переводим часы в минуты
+    }
+
+
+# Ключи params, через которые можно переопределить распределения
+DISTRIBUTION_KEYS = {
+    'arrival': 'arrival_dist',
+    'game': 'game_dist',
+    'resurfacing': 'resurfacing_dist',
+    'interval': 'interval_dist',
+}
+
+
+# Распределения всех случайных входов с учетом переопределений из params
+def resolve_distributions(params):
+    distributions = default_distributions(params)
+    for name, key in DISTRIBUTION_KEYS.items():
+        if params.get(key) is not None:
+            distributions[name] = make_distribution(params[key])
+    return distributions
+
+
+# Независимые генераторы для каждого случайного входа, порожденные из одного зерна
+def spawn_generators(seed=None):
+    children = np.random.SeedSequence(seed).spawn(len(DISTRIBUTION_KEYS))
+    return {name: np.random.default_rng(child) for name, child in zip(DISTRIBUTION_KEYS, children)}
+
+
+# Зерна для серии прогонов (точек плана, повторений сценария), порожденные из одного зерна
+def design_seeds(seed, count):
+    return [int(value) for value in np.random.SeedSequence(seed).generate_state(count)]
+
+
+def make_streams(params, seed=None):
+    # Создает по независимому потоку значений на каждый случайный вход модели.
+    # Потоки порождаются из одного зерна, поэтому при одинаковом seed разные
+    # сценарии получают одинаковые последовательности (общие случайные числа)
+    distributions = resolve_distributions(params)
+    generators = spawn_generators(seed)
+    return {name: VariateStream(distributions[name], generators[name]) for name in DISTRIBUTION_KEYS}
@@ -0,0 +1,227 @@
+# heap_engine.py
+# Облегченное ядро дискретно-событийного моделирования на heapq.
+# Повторяет логику SimPy-модели из model.py, но без процессов, Store и PriorityResource:
+# календарь событий - куча кортежей (время, номер, вид, данные), состояние коробки и
+# очереди хранится явно, заливка льда имеет приоритет без вытеснения текущей игры.
+#
+# События с одинаковым временем SimPy обрабатывает в порядке их создания, поэтому ядро
+# создает события в те же моменты, что и SimPy-модель, включая промежуточные шаги с нулевой
+# задержкой (постановка в очередь, передача коробки, выход из очереди). Тогда ключ
+# (время, номер) дает тот же порядок и те же результаты и на журналах с целыми минутами,
+# где совпадения времени событий - обычное дело
+import heapq
+from collections import deque
+
+# Виды событий
+ARRIVAL = 0            # приход группы
+QUEUED = 1             # группа встала в очередь и запрашивает коробку (Store.put)
+RELEASE = 2            # коробка освобождена и передается первому в очереди запросов
+GAME_GRANTED = 3       # коробка выдана группе, группа покидает очередь (Store.get)
+GAME_START = 4         # начало игры
+GAME_STEP = 5          # минутный шаг игры; шаг, наступивший к концу игры, - ее окончание
+ICE_BAD = 6            # лед стал "плохим", заливка запрашивает коробку
+RESURFACING_START = 7  # коробка выдана заливке
+RESURFACING_END = 8    # окончание заливки
+
+
+# Состояние модели хранится в объекте целиком, поэтому его можно копировать
+# (copy.deepcopy) и продолжать копии независимо - это использует rare_event.py
+class HeapSimulation:
+    def __init__(self, params, stats, streams, arrivals=None):
+        self.until = params['T'] * 60
+        self.capacity = params['K']
+        self.resurfacing_interval = params['S'] * 60  # номинальный интервал для расчета качества льда
+        self.stats = stats
+        self.streams = streams
+
+        self.calendar = []
+        self.seq = 0
+        self.now = 0.0
+
+        # Состояние системы
+        self.queue = deque()             # группы в зоне ожидания: (номер, время прихода, время игры или None)
+        self.requests = deque()          # группы из очереди, запросившие коробку, в порядке запроса
+        self.rink_owner = None           # кому выдана коробка: None, GAME_GRANTED или RESURFACING_START
+        self.resurfacing_since = None    # момент, с которого заливка ждет коробку
+        self.resurfacing_active = False  # идет ли заливка
+        self.current_game = None         # (номер, время игры, момент окончания) для текущей игры
+        self.group_id = 0
+
+        # Источник приходов: синтетический поток или журнал
+        self.trace = iter(arrivals) if arrivals is not None else None
+
+        self.schedule_next_arrival(0.0)
+        self.schedule(streams['interval'](), ICE_BAD)
+
+    def schedule(self, time, kind, payload=None):
+        self.seq += 1
+        heapq.heappush(self.calendar, (time, self.seq, kind, payload))
+
+    def schedule_next_arrival(self, now):
+        if self.trace is None:
+            self.schedule(now + self.streams['arrival'](), ARRIVAL)
+            return
+        for arrival_time, game_time in self.trace:
+            if arrival_time < now:
+                raise ValueError(f"Журнал не упорядочен по времени: {arrival_time:.2f} мин. раньше {now:.2f} мин.")
+            # Момент считается так же, как таймаут в trace_generator
+            self.schedule(now + (arrival_time - now), ARRIVAL, game_time)
+            return
+
+    # Свободная коробка выдается первому в очереди запросов, заливка - вне очереди
+    # (как в PriorityResource); владелец продолжает работу следующим событием
+    def grant(self, now):
+        if self.rink_owner is not None:
+            return
+        if self.resurfacing_since is not None:
+            self.rink_owner = RESURFACING_START
+            self.schedule(now, RESURFACING_START, now - self.resurfacing_since)
+            self.resurfacing_since = None
+        elif self.requests:
+            self.rink_owner = GAME_GRANTED
+            self.schedule(now, GAME_GRANTED, self.requests.popleft())
+
+    def release(self, now):
+        self.rink_owner = None
+        self.schedule(now, RELEASE)
+
+    def start_resurfacing(self, now, wait_time):
+        stats = self.stats
+        stats.ice_resurfacing_wait_times.append(wait_time)
+        if wait_time > 0:
+            stats.bad_ice_time += wait_time
+            if stats.verbose:
+                stats.log(f"⚠️  Игра на 'плохом' льду длилась {wait_time:.2f} мин.")
+        if stats.verbose:
+            stats.log(f"🧊 Начинаем заливку льда в {now:.2f} мин. (ждали: {wait_time:.2f} мин.)")
+        resurfacing_time = self.streams['resurfacing']()
+        self.resurfacing_active = True
+        self.schedule(now + resurfacing_time, RESURFACING_END, resurfacing_time)
+
+    def start_game(self, now, group):
+        stats = self.stats
+        gid, arrival_time, game_time = group
+        wait_time = now - arrival_time
+        stats.total_wait_time += wait_time
+
+        if stats.verbose:
+            resurfacing_interval = self.resurfacing_interval
+            time_since_last_resurfacing = now - stats.last_resurfacing_time
+            if time_since_last_resurfacing > resurfacing_interval:
+                ice_quality_start = max(0.1, 1.0 - (time_since_last_resurfacing - resurfacing_interval) / (resurfacing_interval * 2))
+                stats.log(f"⚠️  Группа {gid} начинает игру на льду качества {ice_quality_start:.2f}")
+            stats.log(f"🏒 Группа {gid} начала ИГРАТЬ в момент времени {now:.2f} мин. (Ожидала: {wait_time:.2f} мин.)")
+
+        if game_time is None:
+            game_time = self.streams['game']()
+        stats.total_game_time += game_time
+        self.current_game = (gid, game_time, now + game_time)
+        self.game_step(now)
+
+    # Шаг игры (как итерация цикла в group_process): учет качества льда и следующий шаг
+    # или, если игра закончилась, освобождение коробки
+    def game_step(self, now):
+        stats = self.stats
+        gid, game_time, game_end_time = self.current_game
+        if now < game_end_time:
+            resurfacing_interval = self.resurfacing_interval
+            time_since_resurfacing = now - stats.last_resurfacing_time
+            step = min(1.0, game_end_time - now)
+            if time_since_resurfacing > resurfacing_interval:
+                quality = max(0.1, 1.0 - (time_since_resurfacing - resurfacing_interval) / (resurfacing_interval * 2))
+                if quality < 0.5:
+                    stats.bad_ice_time += step
+            else:
+                quality = 1.0
+            if stats.record_series:
+                stats.ice_quality_times.append((now, quality))
+            self.schedule(now + step, GAME_STEP)
+            return
+        self.current_game = None
+        stats.served_groups += 1
+        if stats.verbose:
+            stats.log(f"✅ Группа {gid} закончила игру в момент времени {now:.2f} мин. (Играла: {game_time:.2f} мин.)")
+        self.release(now)
+
+    # Обработка одного события; False - моделирование закончено
+    def step(self):
+        calendar = self.calendar
+        if not calendar or calendar[0][0] >= self.until:
+            return False
+        now, _, kind, payload = heapq.heappop(calendar)
+        self.now = now
+
+        if kind == GAME_STEP:
+            self.game_step(now)
+
+        elif kind == ARRIVAL:
+            stats = self.stats
+            queue = self.queue
+            self.group_id += 1
+            stats.arrived_groups += 1
+            self.schedule_next_arrival(now)
+            if self.resurfacing_active and len(queue) + 1 >= self.capacity:
+                stats.full_queue_during_resurfacing += 1
+            if len(queue) >= self.capacity:
+                stats.rejected_groups += 1
+                if stats.verbose:
+                    stats.log(f"⛔ Группа {self.group_id} получила ОТКАЗ в момент времени {now:.2f} мин. (Очередь: {len(queue)}/{self.capacity})")
+                if stats.record_series:
+                    stats.queue_lengths.append(len(queue))
+                    stats.queue_times.append(now)
+                return True
+            if stats.verbose:
+                stats.log(f"👥 Группа {self.group_id} встала в ОЧЕРЕДЬ в момент времени {now:.2f} мин. (Очередь: {len(queue)+1}/{self.capacity})")
+            if stats.record_series:
+                stats.queue_lengths.append(len(queue) + 1)
+                stats.queue_times.append(now)
+            group = (self.group_id, now, payload)
+            queue.append(group)
+            self.schedule(now, QUEUED, group)
+
+        elif kind == QUEUED:
+            self.requests.append(payload)
+            self.grant(now)
+
+        elif kind == RELEASE:
+            self.grant(now)
+
+        elif kind == GAME_GRANTED:
+            self.queue.popleft()
+            self.schedule(now, GAME_START, payload)
+
+        elif kind == GAME_START:
+            self.start_game(now, payload)
+
+        elif kind == ICE_BAD:
+            stats = self.stats
+            if stats.verbose:
+                stats.log(f"🕒 Время заливки льда! Лед стал 'плохим' в {now:.2f} мин.")
+            stats.last_resurfacing_time = now
+            self.resurfacing_since = now
+            self.grant(now)
+
+        elif kind == RESURFACING_START:
+            self.start_resurfacing(now, payload)
+
+        elif kind == RESURFACING_END:
+            stats = self.stats
+            self.resurfacing_active = False
+            stats.total_ice_resurfacing_time += payload
+            stats.ice_resurfacing_count += 1
+            if stats.verbose:
+                stats.log(f"✅ Заливка льда завершена в {now:.2f} мин. (длилась: {payload:.2f} мин.)")
+            self.release(now)
+            self.schedule(now + self.streams['interval'](), ICE_BAD)
+
+        return True
+
+    def run(self):
+        step = self.step
+        while step():
+            pass
+        return self.stats
+
+
+def run_heap_engine(params, stats, streams, arrivals=None):
+    return HeapSimulation(params, stats, streams, arrivals).run()
@@ -1,10 +1,15 @@
 # model.py
+import time
 import simpy
-import random
+from distributions import make_streams
+from heap_engine import run_heap_engine
 
 # Класс "Хоккейная коробка" для хранения статистики
 class HockeyRink:
-    def __init__(self):
+    def __init__(self, verbose=True, record_series=True):
+        self.verbose = verbose  # печатать ли журнал событий
+        self.record_series = record_series  # собирать ли временные ряды (очередь, качество льда)
+        self.arrived_groups = 0  # количество пришедших групп (событий прихода)
         self.served_groups = 0
         self.rejected_groups = 0
         self.total_wait_time = 0.0
@@ -18,17 +23,25 @@ class HockeyRink:
         self.ice_resurfacing_wait_times = []  # время ожидания заливочной машины
         self.last_resurfacing_time = 0.0  # время последней заливки
         self.ice_quality_times = []  # качество льда во времени (0-1)
+        self.wall_time = 0.0  # реальное время расчета (секунды)
+        self.events_per_sec = 0.0  # производительность: обработанных приходов в секунду
+        self.resurfacing_in_progress = False  # идет ли сейчас заливка льда
+        self.full_queue_during_resurfacing = 0  # приходов, заставших полную очередь во время заливки
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
 
 # Процесс: заливка льда
-def ice_resurfacing_process(env, rink_resource, params, stats):
+def ice_resurfacing_process(env, rink_resource, params, stats, streams):
     while True:
-        # Ждем S часов между заливками
-        yield env.timeout(params['S'] * 60)  # переводим часы в минуты
+        # Ждем S часов между заливками (интервал в минутах берется из потока)
+        yield env.timeout(streams['interval']())
         
         # Фиксируем время, когда лед стал "плохим"
         ice_became_bad_time = env.now
         
-        print(f"🕒 Время заливки льда! Лед стал 'плохим' в {env.now:.2f} мин.")
+        stats.log(f"🕒 Время заливки льда! Лед стал 'плохим' в {env.now:.2f} мин.")
         
         # Запоминаем, что начался период "плохого" льда
         stats.last_resurfacing_time = ice_became_bad_time
@@ -44,43 +57,52 @@ def ice_resurfacing_process(env, rink_resource, params, stats):
             # Если была игра, которая продолжалась на "плохом" льду
             if wait_time > 0:
                 stats.bad_ice_time += wait_time
-                print(f"⚠️  Игра на 'плохом' льду длилась {wait_time:.2f} мин.")
+                stats.log(f"⚠️  Игра на 'плохом' льду длилась {wait_time:.2f} мин.")
             
             # Начинаем заливку льда
-            print(f"🧊 Начинаем заливку льда в {env.now:.2f} мин. (ждали: {wait_time:.2f} мин.)")
+            stats.log(f"🧊 Начинаем заливку льда в {env.now:.2f} мин. (ждали: {wait_time:.2f} мин.)")
             
             # Время заливки льда
-            resurfacing_time = params['L']
+            resurfacing_time = streams['resurfacing']()
+            stats.resurfacing_in_progress = True
             yield env.timeout(resurfacing_time)
+            stats.resurfacing_in_progress = False
             
             # Обновляем статистику
             stats.total_ice_resurfacing_time += resurfacing_time
             stats.ice_resurfacing_count += 1
-            print(f"✅ Заливка льда завершена в {env.now:.2f} мин. (длилась: {resurfacing_time} мин.)")
+            stats.log(f"✅ Заливка льда завершена в {env.now:.2f} мин. (длилась: {resurfacing_time:.2f} мин.)")
 
 # Процесс: группа игроков приходит и пытается сыграть
-def group_process(env, group_id, rink, rink_resource, waiting_room, params, stats):
+def group_process(env, group_id, rink, rink_resource, waiting_room, params, stats, streams, game_time=None):
     # Регистрируем факт прихода группы
     arrival_time = env.now
+    stats.arrived_groups += 1
+    
+    # Очередь заполнилась во время заливки льда (редкое событие, см. rare_event.py)
+    if stats.resurfacing_in_progress and len(waiting_room.items) + 1 >= params['K']:
+        stats.full_queue_during_resurfacing += 1
     
     # Проверяем, есть ли место в зоне ожидания (очереди)
     if len(waiting_room.items) >= params['K']:
         # Мест нет - отказ
         stats.rejected_groups += 1
-        print(f"⛔ Группа {group_id} получила ОТКАЗ в момент времени {env.now:.2f} мин. (Очередь: {len(waiting_room.items)}/{params['K']})")
+        stats.log(f"⛔ Группа {group_id} получила ОТКАЗ в момент времени {env.now:.2f} мин. (Очередь: {len(waiting_room.items)}/{params['K']})")
         
         # ЗАПИСЫВАЕМ ДЛИНУ ОЧЕРЕДИ ПРИ ОТКАЗЕ (это важно!)
-        stats.queue_lengths.append(len(waiting_room.items))
-        stats.queue_times.append(env.now)
+        if stats.record_series:
+            stats.queue_lengths.append(len(waiting_room.items))
+            stats.queue_times.append(env.now)
         return
     
     # Есть место - встаем в очередь
-    print(f"👥 Группа {group_id} встала в ОЧЕРЕДЬ в момент времени {env.now:.2f} мин. (Очередь: {len(waiting_room.items)+1}/{params['K']})")
+    stats.log(f"👥 Группа {group_id} встала в ОЧЕРЕДЬ в момент времени {env.now:.2f} мин. (Очередь: {len(waiting_room.items)+1}/{params['K']})")
     
     # ЗАПИСЫВАЕМ ДЛИНУ ОЧЕРЕДИ ПОСЛЕ НАШЕГО ПРИХОДА (исправлено!)
     # Теперь длина будет включать и нашу группу
-    stats.queue_lengths.append(len(waiting_room.items) + 1)  # +1 потому что мы уже в очереди
-    stats.queue_times.append(env.now)
+    if stats.record_series:
+        stats.queue_lengths.append(len(waiting_room.items) + 1)  # +1 потому что мы уже в очереди
+        stats.queue_times.append(env.now)
     
     # Помещаем группу в зону ожидания
     with waiting_room.put({'id': group_id, 'arrival_time': arrival_time}) as wait_req:
@@ -104,15 +126,15 @@ def group_process(env, group_id, rink, rink_resource, waiting_room, params, stat
             if time_since_last_resurfacing > resurfacing_interval:
                 # Лед уже "плохой", но игра еще не закончилась
                 ice_quality_start = max(0.1, 1.0 - (time_since_last_resurfacing - resurfacing_interval) / (resurfacing_interval * 2))
-                print(f"⚠️  Группа {group_id} начинает игру на льду качества {ice_quality_start:.2f}")
+                stats.log(f"⚠️  Группа {group_id} начинает игру на льду качества {ice_quality_start:.2f}")
             
             # Начинаем играть
-            print(f"🏒 Группа {group_id} начала ИГРАТЬ в момент времени {env.now:.2f} мин. (Ожидала: {wait_time:.2f} мин.)")
+            stats.log(f"🏒 Группа {group_id} начала ИГРАТЬ в момент времени {env.now:.2f} мин. (Ожидала: {wait_time:.2f} мин.)")
             
-            # Генерируем время игры (защита от отрицательных значений)
-            min_game_time = max(0.1, params['A'] - params['B'])
-            max_game_time = params['A'] + params['B']
-            game_time = random.uniform(min_game_time, max_game_time)
+            # Генерируем время игры (защита от отрицательных значений - внутри потока),
+            # если оно не было записано в журнале
+            if game_time is None:
+                game_time = streams['game']()
             stats.total_game_time += game_time
             
             # Отслеживаем качество льда во время игры
@@ -124,7 +146,8 @@ def group_process(env, group_id, rink, rink_resource, waiting_room, params, stat
                 if time_since_resurfacing > resurfacing_interval:
                     # Лед "плохой"
                     quality = max(0.1, 1.0 - (time_since_resurfacing - resurfacing_interval) / (resurfacing_interval * 2))
-                    stats.ice_quality_times.append((env.now, quality))
+                    if stats.record_series:
+                        stats.ice_quality_times.append((env.now, quality))
                     
                     # Если качество льда ниже 0.5, считаем это "плохим" льдом
                     if quality < 0.5:
@@ -134,52 +157,93 @@ def group_process(env, group_id, rink, rink_resource, waiting_room, params, stat
                 else:
                     # Лед хороший
                     quality = 1.0
-                    stats.ice_quality_times.append((env.now, quality))
+                    if stats.record_series:
+                        stats.ice_quality_times.append((env.now, quality))
                 
                 # Ждем небольшой шаг времени
                 yield env.timeout(min(1.0, game_end_time - env.now))
             
             # Завершаем игру
             stats.served_groups += 1
-            print(f"✅ Группа {group_id} закончила игру в момент времени {env.now:.2f} мин. (Играла: {game_time:.2f} мин.)")
+            stats.log(f"✅ Группа {group_id} закончила игру в момент времени {env.now:.2f} мин. (Играла: {game_time:.2f} мин.)")
 
 # Процесс-генератор: создает новые группы игроков
-def group_generator(env, rink, rink_resource, waiting_room, params, stats):
+def group_generator(env, rink, rink_resource, waiting_room, params, stats, streams):
     group_id = 0
     while True:
-        # Ждем случайное время до прихода следующей группы (защита от отрицательных значений)
-        min_interval = max(0.1, params['N'] - params['M'])
-        max_interval = params['N'] + params['M']
-        interval = random.uniform(min_interval, max_interval)
+        # Ждем случайное время до прихода следующей группы (защита от отрицательных значений - внутри потока)
+        interval = streams['arrival']()
         yield env.timeout(interval)
         
         group_id += 1
         # Запускаем процесс для новой группы
-        env.process(group_process(env, group_id, rink, rink_resource, waiting_room, params, stats))
+        env.process(group_process(env, group_id, rink, rink_resource, waiting_room, params, stats, streams))
+
+# Процесс-генератор: подает группы из реального журнала прихода (см. traces.py)
+def trace_generator(env, rink, rink_resource, waiting_room, params, stats, streams, arrivals):
+    group_id = 0
+    simulation_time_minutes = params['T'] * 60
+    # arrivals - упорядоченные по времени пары (момент прихода в минутах, время игры или None)
+    for arrival_time, game_time in arrivals:
+        if arrival_time >= simulation_time_minutes:
+            break
+        yield env.timeout(arrival_time - env.now)
+        
+        group_id += 1
+        env.process(group_process(env, group_id, rink, rink_resource, waiting_room, params, stats, streams, game_time))
 
-# Основная функция запуска моделирования
-def run_simulation(params):
+# Прогон модели на SimPy (процессы групп, Store и PriorityResource)
+def run_simpy_engine(params, stats, streams, arrivals=None):
     # Создаем среду SimPy
     env = simpy.Environment()
     
-    # Инициализируем сбор статистики
-    stats = HockeyRink()
-    
     # Создаем ресурсы:
     # 1) Хоккейная коробка (емкость 1 группа) с поддержкой приоритетов
     rink_resource = simpy.PriorityResource(env, capacity=1)
     # 2) Зона ожидания (очередь) с ограниченной емкостью
     waiting_room = simpy.Store(env, capacity=params['K'])
     
-    # Запускаем процесс генерации групп
-    env.process(group_generator(env, stats, rink_resource, waiting_room, params, stats))
+    # Запускаем процесс генерации групп (синтетический или по журналу)
+    if arrivals is None:
+        env.process(group_generator(env, stats, rink_resource, waiting_room, params, stats, streams))
+    else:
+        env.process(trace_generator(env, stats, rink_resource, waiting_room, params, stats, streams, arrivals))
     
     # Запускаем процесс заливки льда
-    env.process(ice_resurfacing_process(env, rink_resource, params, stats))
+    env.process(ice_resurfacing_process(env, rink_resource, params, stats, streams))
     
     # Запускаем моделирование на заданное время (переводим часы в минуты)
+    env.run(until=params['T'] * 60)
+    return stats
+
+# Версия логики модели: меняется, когда при тех же параметрах и seed меняются результаты
+# (сохраняется вместе с результатами, см. results_store.py)
+ENGINE_VERSION = "1.1"
+
+# Доступные ядра моделирования
+ENGINES = {
+    'simpy': run_simpy_engine,
+    'heap': run_heap_engine,
+}
+
+# Основная функция запуска моделирования.
+# arrivals - необязательный журнал прихода групп вместо синтетического генератора,
+# engine - ядро моделирования: "simpy" (по умолчанию) или облегченное "heap"
+def run_simulation(params, arrivals=None, engine="simpy"):
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестное ядро моделирования: {engine} (доступны: {', '.join(ENGINES)})")
+    
+    # Инициализируем сбор статистики
+    stats = HockeyRink(verbose=params.get('verbose', True), record_series=params.get('record_series', True))
+    
+    # Потоки случайных величин (распределения задаются в params, см. distributions.py)
+    streams = make_streams(params, params.get('seed'))
+    
     simulation_time_minutes = params['T'] * 60
-    env.run(until=simulation_time_minutes)
+    wall_start = time.perf_counter()
+    ENGINES[engine](params, stats, streams, arrivals)
+    stats.wall_time = time.perf_counter() - wall_start
+    stats.events_per_sec = stats.arrived_groups / stats.wall_time if stats.wall_time > 0 else 0.0
     
     # Расчет итоговых показателей (защита от деления на ноль)
     if simulation_time_minutes > 0:
@@ -194,29 +258,49 @@ def run_simulation(params):
         bad_ice_percentage = 0
     
     # Вывод результатов
-    print("\n" + "="*60)
-    print("РЕЗУЛЬТАТЫ МОДЕЛИРОВАНИЯ")
-    print("="*60)
-    print(f"Общее время моделирования: {params['T']} час. ({simulation_time_minutes} мин.)")
-    print(f"Количество обслуженных групп: {stats.served_groups}")
-    print(f"Количество отклоненных групп: {stats.rejected_groups}")
-    print(f"Коэффициент загрузки коробки: {stats.utilization:.2f}%")
-    print(f"Количество заливок льда: {stats.ice_resurfacing_count}")
-    print(f"Общее время заливки льда: {stats.total_ice_resurfacing_time:.2f} мин.")
-    print(f"Время катания на 'плохом' льду: {stats.bad_ice_time:.2f} мин. ({bad_ice_percentage:.2f}%)")
+    stats.log("\n" + "="*60)
+    stats.log("РЕЗУЛЬТАТЫ МОДЕЛИРОВАНИЯ")
+    stats.log("="*60)
+    stats.log(f"Общее время моделирования: {params['T']} час. ({simulation_time_minutes} мин.)")
+    stats.log(f"Количество обслуженных групп: {stats.served_groups}")
+    stats.log(f"Количество отклоненных групп: {stats.rejected_groups}")
+    stats.log(f"Коэффициент загрузки коробки: {stats.utilization:.2f}%")
+    stats.log(f"Количество заливок льда: {stats.ice_resurfacing_count}")
+    stats.log(f"Общее время заливки льда: {stats.total_ice_resurfacing_time:.2f} мин.")
+    stats.log(f"Время катания на 'плохом' льду: {stats.bad_ice_time:.2f} мин. ({bad_ice_percentage:.2f}%)")
+    stats.log(f"Производительность расчета: {stats.events_per_sec:.0f} событий прихода/с ({stats.wall_time:.2f} с)")
     
     if stats.served_groups > 0:
         avg_wait = stats.total_wait_time / stats.served_groups
-        print(f"Среднее время ожидания в очереди: {avg_wait:.2f} мин.")
+        stats.log(f"Среднее время ожидания в очереди: {avg_wait:.2f} мин.")
     else:
-        print("Среднее время ожидания: нет данных")
+        stats.log("Среднее время ожидания: нет данных")
     
     if stats.ice_resurfacing_count > 0:
         avg_resurfacing_wait = sum(stats.ice_resurfacing_wait_times) / len(stats.ice_resurfacing_wait_times)
-        print(f"Среднее время ожидания заливочной машины: {avg_resurfacing_wait:.2f} мин.")
+        stats.log(f"Среднее время ожидания заливочной машины: {avg_resurfacing_wait:.2f} мин.")
     
     return stats
 
+# Сводные показатели прогона (для серий прогонов, анализа чувствительности и хранения)
+def summarize(stats, params):
+    simulation_time_minutes = params['T'] * 60
+    total_groups = stats.served_groups + stats.rejected_groups
+    return {
+        'arrived_groups': stats.arrived_groups,
+        'served_groups': stats.served_groups,
+        'rejected_groups': stats.rejected_groups,
+        'rejection_rate': (stats.rejected_groups / total_groups * 100) if total_groups > 0 else 0.0,
+        'utilization': stats.utilization,
+        'bad_ice_time': stats.bad_ice_time,
+        'bad_ice_percent': (stats.bad_ice_time / simulation_time_minutes * 100) if simulation_time_minutes > 0 else 0.0,
+        'avg_wait': stats.total_wait_time / stats.served_groups if stats.served_groups > 0 else 0.0,
+        'ice_resurfacing_count': stats.ice_resurfacing_count,
+        'full_queue_during_resurfacing': stats.full_queue_during_resurfacing,
+        'avg_resurfacing_wait': (sum(stats.ice_resurfacing_wait_times) / len(stats.ice_resurfacing_wait_times)
+                                 if stats.ice_resurfacing_wait_times else 0.0),
+    }
+
 # Параметры моделирования (можно менять)
 if __name__ == "__main__":
     # Параметры по умолчанию
@@ -228,7 +312,11 @@ if __name__ == "__main__":
         'K': 5,    # Максимальный размер очереди
         'T': 10,   # Время моделирования в часах
         'S': 2,    # Интервал между заливками льда (часы)
-        'L': 30    # Время заливки льда (минуты)
+        'L': 30,   # Время заливки льда (минуты)
+        'seed': None,  # Зерно генератора случайных чисел (None - случайное)
+        # Распределения можно переопределить, например:
+        # 'arrival_dist': {'kind': 'exponential', 'mean': 5},
+        # 'game_dist': {'kind': 'lognormal', 'mean': 12, 'std': 5},
     }
     
     # Запуск моделирования
@@ -0,0 +1,289 @@
+# rare_event.py
+# Оценка вероятностей редких событий при малой нагрузке (отказ, полная очередь во время
+# заливки) с контролем относительной погрешности. Два метода:
+# - многоуровневое расщепление по длине очереди (по умолчанию);
+# - выборка по значимости: интервалы прихода сдвигаются в сторону меньших значений,
+#   время игры - в сторону больших, а каждый прогон взвешивается отношением правдоподобия
+import copy
+import math
+import sys
+
+import numpy as np
+
+from distributions import VariateStream, make_streams, resolve_distributions, spawn_generators
+from heap_engine import HeapSimulation, run_heap_engine
+from model import HockeyRink
+
+# Редкие события: признак наступления события за время моделирования
+EVENTS = {
+    'rejection': lambda stats: stats.rejected_groups > 0,
+    'full_queue_resurfacing': lambda stats: stats.full_queue_during_resurfacing > 0,
+}
+
+# Направление сдвига для каждого входа: -1 - к меньшим значениям, +1 - к большим
+TILTED_INPUTS = {'arrival': -1, 'game': 1}
+
+# Сила сдвига, перебираемая в пробных прогонах (0 - обычный метод Монте-Карло)
+TILT_GRID = (0.0, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0)
+
+# Минимальная доля эффективных попаданий: при более сильном сдвиге веса вырождаются,
+# и выборочная погрешность перестает отражать реальную
+MIN_HIT_ESS_FRACTION = 0.1
+
+# Размер блока потоков у копий модели при расщеплении
+CLONE_BLOCK_SIZE = 64
+
+# Квантиль нормального распределения для 95% интервала
+Z_95 = 1.959963984540054
+
+
+# Поток значений из смещенного распределения с накоплением логарифма отношения правдоподобия
+# только для реально использованных моделью значений. Как только событие наступило (stop()),
+# поток переходит на исходное распределение: дальнейшие значения не влияют на индикатор,
+# и вес прогона перестает накапливаться
+class WeightedStream(VariateStream):
+    def __init__(self, nominal, proposal, rng, stop):
+        super().__init__(proposal, rng)
+        self.nominal = nominal
+        self.stop = stop
+        self.log_weight = 0.0
+        self._log_ratios = []
+        self._nominal_stream = None
+
+    def _refill(self):
+        block = self.distribution.sample(self.rng, self.block_size)
+        self._log_ratios = (self.nominal.logpdf(block) - self.distribution.logpdf(block)).tolist()
+        self._buffer = np.maximum(block, self.min_value).tolist()
+        self._pos = 0
+
+    def __call__(self):
+        if self._nominal_stream is None and self.stop():
+            self._nominal_stream = VariateStream(self.nominal, self.rng, self.block_size, self.min_value)
+        if self._nominal_stream is not None:
+            return self._nominal_stream()
+        value = super().__call__()
+        self.log_weight += self._log_ratios[self._pos - 1]
+        return value
+
+
+# Один прогон с заданной силой сдвига; возвращает статистику и вес прогона
+def weighted_run(params, strength, seed, event='rejection'):
+    indicator = EVENTS[event]
+    stats = HockeyRink(verbose=False, record_series=False)
+    distributions = resolve_distributions(params)
+    generators = spawn_generators(seed)
+    streams = {name: VariateStream(dist, generators[name]) for name, dist in distributions.items()}
+    weighted = []
+    if strength:
+        for name, direction in TILTED_INPUTS.items():
+            nominal = distributions[name]
+            # Постоянная величина (например, M=0 или B=0) не сдвигается и не меняет вес
+            if getattr(nominal, 'degenerate', False):
+                continue
+            if not hasattr(nominal, 'tilt'):
+                raise ValueError(f"Распределение {type(nominal).__name__} для '{name}' не поддерживает сдвиг")
+            streams[name] = WeightedStream(nominal, nominal.tilt(direction * strength), generators[name],
+                                           lambda: indicator(stats))
+            weighted.append(streams[name])
+    run_heap_engine(params, stats, streams)
+    return stats, math.exp(sum(stream.log_weight for stream in weighted))
+
+
+# Оценка вероятности и ее относительная погрешность по взвешенным индикаторам
+def _estimate(values):
+    values = np.asarray(values)
+    mean = values.mean()
+    if mean == 0 or values.size < 2:
+        return float(mean), math.inf
+    return float(mean), float(values.std(ddof=1) / (math.sqrt(values.size) * mean))
+
+
+# Эффективное число попаданий: (сумма весов)^2 / сумма квадратов весов по прогонам с событием
+def _hit_ess(values):
+    hits = np.asarray(values)
+    hits = hits[hits > 0]
+    return float(hits.sum() ** 2 / (hits ** 2).sum()) if hits.size else 0.0
+
+
+# Выбор силы сдвига по пробным прогонам: минимальная относительная погрешность среди
+# сдвигов, при которых веса попаданий не вырождаются
+def choose_tilt(params, event='rejection', pilot_runs=200, seed=0, grid=TILT_GRID):
+    indicator = EVENTS[event]
+    best_strength, best_error = grid[-1], math.inf
+    fallback_strength, fallback_fraction = None, 0.0
+    for g, strength in enumerate(grid):
+        values = []
+        for i in range(pilot_runs):
+            stats, weight = weighted_run(params, strength, [seed, 0, g, i], event)
+            values.append(weight if indicator(stats) else 0.0)
+        hits = np.count_nonzero(values)
+        if hits == 0:
+            continue
+        fraction = _hit_ess(values) / hits
+        if fraction > fallback_fraction:
+            fallback_strength, fallback_fraction = strength, fraction
+        _, relative_error = _estimate(values)
+        if fraction >= MIN_HIT_ESS_FRACTION and relative_error < best_error:
+            best_strength, best_error = strength, relative_error
+    if best_error == math.inf and fallback_strength is not None:
+        return fallback_strength
+    return best_strength
+
+
+# Уровни длины очереди, которые модель обязана пройти до наступления события:
+# отказ возможен только при очереди K, полная очередь во время заливки - при очереди K-1
+def splitting_levels(params, event):
+    top = params['K'] if event == 'rejection' else params['K'] - 1
+    return list(range(1, top + 1))
+
+
+# Копия состояния модели с новыми независимыми потоками случайных чисел. Потоки не копируются
+# (их буферы велики и все равно заменяются), копия получает потоки с небольшим блоком,
+# так как до конца этапа расходует лишь несколько значений
+def _clone(simulation, seed):
+    streams = simulation.streams
+    simulation.streams = None
+    try:
+        clone = copy.deepcopy(simulation)
+    finally:
+        simulation.streams = streams
+    generators = spawn_generators(seed)
+    clone.streams = {
+        name: VariateStream(stream.distribution, generators[name], CLONE_BLOCK_SIZE, stream.min_value)
+        for name, stream in streams.items()
+    }
+    return clone
+
+
+# Продвижение модели до выполнения условия (True) или до конца моделирования (False)
+def _advance(simulation, reached):
+    while not reached(simulation):
+        if not simulation.step():
+            return False
+    return True
+
+
+# Одна оценка методом многоуровневого расщепления с фиксированным числом траекторий
+# на уровень (effort): траектории, достигшие очередного уровня длины очереди, копируются
+# и продолжаются с новыми случайными числами. Оценка - произведение долей успехов по уровням
+def splitting_run(params, event, effort, seed):
+    indicator = EVENTS[event]
+    rng = np.random.default_rng(seed)
+    stages = [lambda sim, level=level: len(sim.queue) >= level or indicator(sim.stats)
+              for level in splitting_levels(params, event)]
+    stages.append(lambda sim: indicator(sim.stats))
+
+    probability = 1.0
+    entrance = None
+    for stage, reached in enumerate(stages):
+        survivors = []
+        for i in range(effort):
+            if entrance is None:
+                stats = HockeyRink(verbose=False, record_series=False)
+                simulation = HeapSimulation(params, stats, make_streams(params, seed + [stage, i]))
+            else:
+                simulation = _clone(entrance[rng.integers(len(entrance))], seed + [stage, i])
+            if _advance(simulation, reached):
+                survivors.append(simulation)
+        probability *= len(survivors) / effort
+        if not survivors:
+            return 0.0
+        entrance = survivors
+    return probability
+
+
+# Настройки остановки по умолчанию: для выборки по значимости единица выборки - один прогон,
+# для расщепления - одна независимая оценка по всем уровням
+METHOD_DEFAULTS = {
+    'importance': {'batch_size': 200, 'max_samples': 20000, 'min_hits': 20},
+    'splitting': {'batch_size': 10, 'max_samples': 500, 'min_hits': 10},
+}
+
+
+# Оценка вероятности редкого события с остановкой по относительной погрешности:
+# независимые несмещенные оценки добавляются пакетами, пока погрешность не станет
+# не больше target_re (и ненулевых оценок не наберется min_hits) или не кончится бюджет
+def estimate_rare_event(params, event='rejection', method='splitting', target_re=0.1, seed=0,
+                        batch_size=None, max_samples=None, min_hits=None,
+                        effort=100, strength=None, pilot_runs=200):
+    if event not in EVENTS:
+        raise ValueError(f"Неизвестное событие: {event} (доступны: {', '.join(EVENTS)})")
+    if method not in METHOD_DEFAULTS:
+        raise ValueError(f"Неизвестный метод: {method} (доступны: {', '.join(METHOD_DEFAULTS)})")
+    defaults = METHOD_DEFAULTS[method]
+    batch_size = batch_size or defaults['batch_size']
+    max_samples = max_samples or defaults['max_samples']
+    min_hits = min_hits or defaults['min_hits']
+    indicator = EVENTS[event]
+
+    if method == 'importance':
+        if strength is None:
+            strength = choose_tilt(params, event, pilot_runs, seed)
+
+        def sample(index):
+            stats, weight = weighted_run(params, strength, [seed, 1, index], event)
+            return weight if indicator(stats) else 0.0
+    else:
+        def sample(index):
+            return splitting_run(params, event, effort, [seed, 2, index])
+
+    values = []
+    probability, relative_error = 0.0, math.inf
+    while len(values) < max_samples:
+        for _ in range(min(batch_size, max_samples - len(values))):
+            values.append(sample(len(values)))
+        probability, relative_error = _estimate(values)
+        if np.count_nonzero(values) >= min_hits and relative_error <= target_re:
+            break
+
+    hits = int(np.count_nonzero(values))
+    half_width = Z_95 * probability * relative_error if math.isfinite(relative_error) else math.inf
+    result = {
+        'event': event,
+        'method': method,
+        'probability': probability,
+        'relative_error': relative_error,
+        'confidence_interval': (max(0.0, probability - half_width), probability + half_width),
+        'samples': len(values),
+        'hits': hits,
+        'converged': hits >= min_hits and relative_error <= target_re,
+    }
+    if method == 'importance':
+        result.update(strength=strength, effective_hits=_hit_ess(values))
+    else:
+        result.update(effort=effort, levels=len(splitting_levels(params, event)))
+    return result
+
+
+def print_estimate(result):
+    print(f"Событие: {result['event']} (метод: {result['method']})")
+    if result['hits'] == 0:
+        print(f"Событие не наблюдалось ни в одной из {result['samples']} оценок")
+        return
+    low, high = result['confidence_interval']
+    status = "достигнута" if result['converged'] else "НЕ достигнута"
+    print(f"Вероятность: {result['probability']:.3e} (95% интервал [{low:.3e}; {high:.3e}])")
+    print(f"Относительная погрешность: {result['relative_error']:.3f} (точность {status})")
+    if result['method'] == 'importance':
+        print(f"Прогонов: {result['samples']}, попаданий: {result['hits']}, сила сдвига: {result['strength']}, "
+              f"эффективных попаданий: {result['effective_hits']:.0f}")
+    else:
+        print(f"Независимых оценок: {result['samples']} (ненулевых: {result['hits']}), "
+              f"уровней: {result['levels']}, траекторий на уровень: {result['effort']}")
+
+
+if __name__ == "__main__":
+    # Пример: python rare_event.py 60 5 [splitting|importance]  (N и K при остальных параметрах
+    # по умолчанию). При равномерных интервалах N±M с малым M отказ при большом N невозможен
+    # вовсе, поэтому в примере интервалы прихода экспоненциальные со средним N
+    N = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    params = {
+        'N': N, 'M': 0, 'A': 12, 'B': 8,
+        'K': int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+        'T': 10, 'S': 2, 'L': 30,
+        'arrival_dist': {'kind': 'exponential', 'mean': N},
+    }
+    method = sys.argv[3] if len(sys.argv) > 3 else 'splitting'
+    for event in EVENTS:
+        print_estimate(estimate_rare_event(params, event, method))
+        print()
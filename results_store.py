@@ -0,0 +1,159 @@
+# results_store.py
+# Локальное хранилище результатов моделирования в SQLite: параметры сценария, seed,
+# ядро и его версия, сводные показатели и сжатые временные ряды (очередь, качество льда)
+import io
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from model import ENGINE_VERSION, summarize
+
+DEFAULT_PATH = 'results.db'
+
+# Параметры сценария (по каждому строится индекс) и сводные показатели
+PARAM_COLUMNS = ('N', 'M', 'A', 'B', 'K', 'T', 'S', 'L')
+METRIC_COLUMNS = (
+    'arrived_groups', 'served_groups', 'rejected_groups', 'rejection_rate', 'utilization',
+    'bad_ice_time', 'bad_ice_percent', 'avg_wait', 'ice_resurfacing_count',
+    'full_queue_during_resurfacing', 'avg_resurfacing_wait',
+)
+DISTRIBUTION_PARAMS = ('arrival_dist', 'game_dist', 'resurfacing_dist', 'interval_dist')
+
+COLUMNS = ('created_at', 'engine', 'engine_version', 'seed') + PARAM_COLUMNS + ('distributions',) + METRIC_COLUMNS + ('series',)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    engine TEXT NOT NULL,
+    engine_version TEXT NOT NULL,
+    seed INTEGER,
+    {', '.join(f'{name} REAL' for name in PARAM_COLUMNS)},
+    distributions TEXT,
+    {', '.join(f'{name} REAL' for name in METRIC_COLUMNS)},
+    series BLOB
+);
+{''.join(f'CREATE INDEX IF NOT EXISTS idx_results_{name} ON results({name});' for name in PARAM_COLUMNS)}
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON results(created_at);
+"""
+
+
+# Временные ряды прогона в виде массивов NumPy
+def series_from_stats(stats):
+    quality = np.asarray(stats.ice_quality_times, dtype=float).reshape(-1, 2)
+    return {
+        'queue_times': np.asarray(stats.queue_times, dtype=float),
+        'queue_lengths': np.asarray(stats.queue_lengths, dtype=np.int32),
+        'ice_quality_times': quality[:, 0],
+        'ice_quality': quality[:, 1],
+        'ice_resurfacing_wait_times': np.asarray(stats.ice_resurfacing_wait_times, dtype=float),
+    }
+
+
+def _pack_series(series):
+    if not series:
+        return None
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **series)
+    return buffer.getvalue()
+
+
+def _unpack_series(blob):
+    if blob is None:
+        return {}
+    with np.load(io.BytesIO(blob)) as data:
+        return {name: data[name] for name in data.files}
+
+
+# Хранилище с пакетной записью: строки копятся в памяти и пишутся одной транзакцией
+# по batch_size штук (и при flush/закрытии). Режим WAL позволяет читать базу во время
+# записи, а busy_timeout - нескольким процессам писать по очереди без ошибок блокировки
+class ResultsStore:
+    def __init__(self, path=DEFAULT_PATH, batch_size=100, timeout=30.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Добавление результата по сводным показателям (summarize) и, при наличии, рядам
+    def add(self, params, summary, engine='simpy', series=None):
+        distributions = {key: params[key] for key in DISTRIBUTION_PARAMS if params.get(key) is not None}
+        row = (
+            time.time(), engine, ENGINE_VERSION, params.get('seed'),
+            *(params.get(name) for name in PARAM_COLUMNS),
+            json.dumps(distributions, default=str) if distributions else None,
+            *(summary.get(name) for name in METRIC_COLUMNS),
+            _pack_series(series),
+        )
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    # Добавление результата прямо из статистики прогона
+    def add_stats(self, params, stats, engine='simpy'):
+        series = series_from_stats(stats) if stats.record_series else None
+        self.add(params, summarize(stats, params), engine, series)
+
+    def flush(self):
+        if not self._pending:
+            return
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders})", self._pending)
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    # Выборка результатов по диапазонам параметров: ranges = {'K': (3, 8), 'S': (1.5, 3)}
+    def query(self, ranges=None, engine=None, limit=1000):
+        self.flush()
+        conditions, values = [], []
+        for name, (low, high) in (ranges or {}).items():
+            if name not in PARAM_COLUMNS:
+                raise ValueError(f"Неизвестный параметр: {name}")
+            conditions.append(f"{name} BETWEEN ? AND ?")
+            values.extend((low, high))
+        if engine is not None:
+            conditions.append("engine = ?")
+            values.append(engine)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        columns = ('id',) + COLUMNS[:-1]
+        rows = self.connection.execute(
+            f"SELECT {', '.join(columns)} FROM results {where} ORDER BY created_at DESC LIMIT ?",
+            values + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_series(self, result_id):
+        self.flush()
+        row = self.connection.execute("SELECT series FROM results WHERE id = ?", (result_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Результат {result_id} не найден")
+        return _unpack_series(row['series'])
+
+    # Минимальные и максимальные значения параметров (для фильтров в приложении)
+    def parameter_bounds(self):
+        self.flush()
+        expressions = ', '.join(f"MIN({name}), MAX({name})" for name in PARAM_COLUMNS)
+        row = self.connection.execute(f"SELECT COUNT(*), {expressions} FROM results").fetchone()
+        if row[0] == 0:
+            return {}
+        return {name: (row[1 + 2 * i], row[2 + 2 * i]) for i, name in enumerate(PARAM_COLUMNS)}
+
+    def count(self):
+        self.flush()
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
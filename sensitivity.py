@@ -0,0 +1,229 @@
+# sensitivity.py
+# Глобальный анализ чувствительности модели: скрининг Морриса и индексы Соболя
+# первого и полного порядка (схема Сальтелли) с бутстреп-доверительными интервалами
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from distributions import design_seeds
+from model import ENGINE_VERSION, run_simulation, summarize
+
+# Исследуемые параметры модели и их диапазоны по умолчанию (разбросы M и B - доли от N и A)
+DEFAULT_BOUNDS = {
+    'N': (3, 30),       # средний интервал между группами, мин
+    'M_frac': (0, 1),   # разброс интервала, доля от N
+    'A': (5, 60),       # среднее время игры, мин
+    'B_frac': (0, 1),   # разброс времени игры, доля от A
+    'K': (1, 10),       # размер очереди, групп
+    'S': (0.5, 4),      # интервал между заливками, ч
+    'L': (10, 45),      # время заливки, мин
+}
+INTEGER_FACTORS = ('K',)
+
+# Факторы-доли: фактор -> (параметр модели, параметр-основа), M = M_frac * N, B = B_frac * A.
+# Диапазоны самих M и B, переданные в bounds, остаются в минутах
+RELATIVE_FACTORS = {'M_frac': ('M', 'N'), 'B_frac': ('B', 'A')}
+
+# Показатели, по которым считаются индексы
+OUTPUTS = ('rejection_rate', 'bad_ice_percent')
+
+# Параметры, не меняющиеся в плане эксперимента
+DEFAULT_BASE_PARAMS = {'T': 100}
+
+
+# Кэш вычисленных точек плана: повторный анализ с пересекающимся планом
+# (тот же seed, больший размер выборки) не пересчитывает уже известные точки
+class EvaluationCache:
+    def __init__(self, path=None):
+        self.path = path
+        self.results = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.results = json.load(f)
+
+    # Версия модели входит в ключ: результаты прежней версии не используются повторно
+    @staticmethod
+    def key(params, engine):
+        return json.dumps([ENGINE_VERSION, engine, sorted(params.items())], default=str)
+
+    def get(self, params, engine):
+        return self.results.get(self.key(params, engine))
+
+    def put(self, params, engine, summary):
+        self.results[self.key(params, engine)] = summary
+
+    def save(self):
+        if self.path is not None:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.results, f)
+
+
+# Перевод точки единичного гиперкуба в параметры модели
+def scale(unit_row, bounds, base_params):
+    params = dict(base_params)
+    for factor, value in zip(bounds, unit_row):
+        low, high = bounds[factor]
+        params[factor] = low + value * (high - low)
+        if factor in INTEGER_FACTORS:
+            params[factor] = int(round(params[factor]))
+    for factor, (target, reference) in RELATIVE_FACTORS.items():
+        if factor in bounds:
+            params[target] = params.pop(factor) * params[reference]
+    return params
+
+
+# Прогон одной точки плана (выполняется в отдельном процессе)
+def _evaluate(task):
+    params, engine = task
+    stats = run_simulation(dict(params, verbose=False, record_series=False), engine=engine)
+    return summarize(stats, params)
+
+
+# Параллельный расчет точек плана пакетами; результаты каждого пакета сразу
+# попадают в кэш, поэтому прерванный анализ можно продолжить. Если передано хранилище
+# (results_store.ResultsStore), результаты пишутся в него из основного процесса пакетами,
+# и рабочие процессы не ждут друг друга на блокировке базы
+def evaluate_design(param_rows, engine='heap', cache=None, max_workers=None, batch_size=256, store=None):
+    cache = cache if cache is not None else EvaluationCache()
+    pending = [params for params in param_rows if cache.get(params, engine) is None]
+    if pending:
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                chunksize = max(1, len(batch) // (4 * workers))
+                for params, summary in zip(batch, executor.map(_evaluate, [(p, engine) for p in batch],
+                                                               chunksize=chunksize)):
+                    cache.put(params, engine, summary)
+                    if store is not None:
+                        store.add(params, summary, engine)
+                cache.save()
+                if store is not None:
+                    store.flush()
+    return np.array([[cache.get(params, engine)[output] for output in OUTPUTS] for params in param_rows])
+
+
+# Процентильный бутстреп-интервал для статистики от индексов строк
+def _bootstrap(statistic, count, rng, resamples, confidence):
+    values = np.array([statistic(rng.integers(0, count, count)) for _ in range(resamples)])
+    alpha = (1 - confidence) / 2
+    return np.quantile(values, alpha, axis=0), np.quantile(values, 1 - alpha, axis=0)
+
+
+# Скрининг Морриса: траектории "по одному фактору за шаг" на сетке из levels уровней.
+# Точки одной траектории используют общее зерно, чтобы элементарные эффекты не тонули в шуме
+def morris(trajectories=20, levels=4, bounds=None, base_params=None, seed=0, engine='heap',
+           cache=None, max_workers=None, resamples=1000, confidence=0.95, store=None):
+    bounds = dict(bounds or DEFAULT_BOUNDS)
+    base_params = dict(base_params or DEFAULT_BASE_PARAMS)
+    k = len(bounds)
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    starts = np.arange(levels // 2) / (levels - 1)
+
+    points, orders = [], []
+    for trajectory_seed in design_seeds(seed, trajectories):
+        x = rng.choice(starts, k)
+        order = rng.permutation(k)
+        trajectory = [x.copy()]
+        for factor in order:
+            x[factor] += delta
+            trajectory.append(x.copy())
+        orders.append(order)
+        points.extend(dict(scale(row, bounds, base_params), seed=trajectory_seed) for row in trajectory)
+
+    outputs = evaluate_design(points, engine, cache, max_workers, store=store).reshape(trajectories, k + 1, len(OUTPUTS))
+
+    # Элементарные эффекты: effects[траектория, фактор, показатель]
+    effects = np.empty((trajectories, k, len(OUTPUTS)))
+    for t, order in enumerate(orders):
+        effects[t, order] = (outputs[t, 1:] - outputs[t, :-1]) / delta
+
+    mu_star_low, mu_star_high = _bootstrap(lambda idx: np.abs(effects[idx]).mean(axis=0),
+                                           trajectories, rng, resamples, confidence)
+    report = {}
+    for j, output in enumerate(OUTPUTS):
+        report[output] = {
+            factor: {
+                'mu': effects[:, i, j].mean(),
+                'mu_star': np.abs(effects[:, i, j]).mean(),
+                'sigma': effects[:, i, j].std(ddof=1),
+                'mu_star_conf': (mu_star_low[i, j], mu_star_high[i, j]),
+            }
+            for i, factor in enumerate(bounds)
+        }
+    return report
+
+
+# Индексы Соболя по схеме Сальтелли: матрицы A, B и A с i-м столбцом из B.
+# Строки с одинаковым номером во всех матрицах используют общее зерно
+def sobol(samples=256, bounds=None, base_params=None, seed=0, engine='heap',
+          cache=None, max_workers=None, resamples=1000, confidence=0.95, store=None):
+    bounds = dict(bounds or DEFAULT_BOUNDS)
+    base_params = dict(base_params or DEFAULT_BASE_PARAMS)
+    k = len(bounds)
+    rng = np.random.default_rng(seed)
+    # Строки генерируются последовательно, поэтому план большего размера
+    # с тем же seed начинается с точек меньшего и берет их из кэша
+    base = rng.random((samples, 2 * k))
+    a, b = base[:, :k], base[:, k:]
+    seeds = design_seeds(seed, samples)
+
+    matrices = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        matrices.append(ab)
+    points = [dict(scale(row, bounds, base_params), seed=seeds[r])
+              for matrix in matrices for r, row in enumerate(matrix)]
+    outputs = evaluate_design(points, engine, cache, max_workers, store=store).reshape(k + 2, samples, len(OUTPUTS))
+    f_a, f_b, f_ab = outputs[0], outputs[1], outputs[2:]
+
+    def indices(idx):
+        variance = np.concatenate([f_a[idx], f_b[idx]]).var(axis=0)
+        variance = np.where(variance > 0, variance, np.nan)
+        first = (f_b[idx] * (f_ab[:, idx] - f_a[idx])).mean(axis=1) / variance
+        total = 0.5 * ((f_a[idx] - f_ab[:, idx]) ** 2).mean(axis=1) / variance
+        return np.stack([first, total])
+
+    estimate = indices(np.arange(samples))
+    low, high = _bootstrap(indices, samples, rng, resamples, confidence)
+    report = {}
+    for j, output in enumerate(OUTPUTS):
+        report[output] = {
+            factor: {
+                'S1': estimate[0, i, j],
+                'S1_conf': (low[0, i, j], high[0, i, j]),
+                'ST': estimate[1, i, j],
+                'ST_conf': (low[1, i, j], high[1, i, j]),
+            }
+            for i, factor in enumerate(bounds)
+        }
+    return report
+
+
+def print_report(report):
+    for output, factors in report.items():
+        print(f"\nПоказатель: {output}")
+        for factor, values in factors.items():
+            line = []
+            for name, value in values.items():
+                if isinstance(value, tuple):
+                    line.append(f"{name}=[{value[0]:.3f}; {value[1]:.3f}]")
+                else:
+                    line.append(f"{name}={value:.3f}")
+            print(f"  {factor}: " + ", ".join(line))
+
+
+if __name__ == "__main__":
+    # Пример: python sensitivity.py sobol 512  (или morris 30)
+    method = sys.argv[1] if len(sys.argv) > 1 else 'morris'
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    cache = EvaluationCache('sensitivity_cache.json')
+    if method == 'sobol':
+        print_report(sobol(samples=size, cache=cache))
+    else:
+        print_report(morris(trajectories=size, cache=cache))
@@ -1,6 +1,15 @@
 # test_model.py
 # Валидация и тестирование модели хоккейной коробки
-from model import run_simulation
+import os
+import tempfile
+import numpy as np
+from model import ENGINES, run_simulation
+from distributions import Histogram, VariateStream, make_streams
+from traces import convert_csv_to_binary, replay_trace
+from sensitivity import morris
+from rare_event import estimate_rare_event
+from results_store import ResultsStore
+from comparison import build_scenarios, metric_intervals, paired_differences, run_scenarios, t_quantile
 
 def run_tests():
     print("🚀 ЗАПУСК ТЕСТИРОВАНИЯ МОДЕЛИ")
@@ -8,17 +17,146 @@ def run_tests():
     
     # Тест 1: Предельная нагрузка
     print("\n📊 ТЕСТ 1: Предельная нагрузка")
-    params1 = {'N': 1, 'M': 0, 'A': 120, 'B': 0, 'K': 2, 'T': 2}
+    params1 = {'N': 1, 'M': 0, 'A': 120, 'B': 0, 'K': 2, 'T': 2, 'S': 2, 'L': 30}
     results1 = run_simulation(params1)
     print(f"Ожидаем: много отказов, загрузка ~100%")
     print(f"Получили: отказы={results1.rejected_groups}, загрузка={results1.utilization:.1f}%")
     
     # Тест 2: Нет очереди
     print("\n📊 ТЕСТ 2: Нет очереди")
-    params2 = {'N': 60, 'M': 0, 'A': 5, 'B': 0, 'K': 5, 'T': 2}
+    params2 = {'N': 60, 'M': 0, 'A': 5, 'B': 0, 'K': 5, 'T': 2, 'S': 2, 'L': 30}
     results2 = run_simulation(params2)
     print(f"Ожидаем: мало отказов, загрузка <50%")
     print(f"Получили: отказы={results2.rejected_groups}, загрузка={results2.utilization:.1f}%")
+    
+    # Тест 3: Воспроизводимость при одинаковом зерне
+    print("\n📊 ТЕСТ 3: Воспроизводимость при одинаковом зерне")
+    params3 = {'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'T': 10, 'S': 2, 'L': 30, 'seed': 42}
+    results3a = run_simulation(params3)
+    results3b = run_simulation(params3)
+    print(f"Ожидаем: одинаковые результаты двух прогонов")
+    print(f"Получили: обслужено={results3a.served_groups}/{results3b.served_groups}, "
+          f"отказы={results3a.rejected_groups}/{results3b.rejected_groups}")
+    
+    # Тест 4: Подключаемые распределения
+    print("\n📊 ТЕСТ 4: Подключаемые распределения")
+    streams = make_streams({'N': 5, 'M': 4, 'A': 12, 'B': 8, 'S': 2, 'L': 30,
+                            'arrival_dist': {'kind': 'exponential', 'mean': 5}}, seed=1)
+    arrivals = [streams['arrival']() for _ in range(20000)]
+    booking_data = np.random.default_rng(2).normal(60, 10, 5000)
+    fitted = VariateStream(Histogram.fit(booking_data), np.random.default_rng(3))
+    fitted_values = [fitted() for _ in range(20000)]
+    print(f"Ожидаем: среднее экспоненциальных интервалов ~5, среднее по гистограмме ~60")
+    print(f"Получили: {np.mean(arrivals):.2f}, {np.mean(fitted_values):.2f}")
+    
+    # Тест 5: Воспроизведение журнала прихода групп
+    print("\n📊 ТЕСТ 5: Воспроизведение журнала прихода групп")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'arrivals.csv')
+        with open(csv_path, 'w') as f:
+            f.write("time,duration\n")
+            for i in range(1, 101):
+                f.write(f"{i * 30},10\n")  # группа каждые 30 минут, игра 10 минут
+        binary_path = os.path.join(tmp, 'arrivals.bin')
+        convert_csv_to_binary(csv_path, binary_path)
+        params5 = {'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'T': 40, 'S': 2, 'L': 30}
+        results5a = replay_trace(csv_path, params5)
+        results5b = replay_trace(binary_path, params5, engine='heap')
+        # Журнал с датами, комментарием перед заголовком и локальной перестановкой записей
+        dated_path = os.path.join(tmp, 'dated.csv')
+        with open(dated_path, 'w') as f:
+            f.write("# турникет 1\ntime,duration\n2024-01-10T10:05,10\n2024-01-10T10:00,10\n2024-01-10T10:30,10\n")
+        results5c = replay_trace(dated_path, params5, reorder_window=2)
+    print(f"Ожидаем: 79 приходов (до 40 ч), 0 отказов, одинаковый результат CSV (simpy) и бинарного журнала (heap)")
+    print(f"Получили: приходов={results5a.arrived_groups}/{results5b.arrived_groups}, "
+          f"отказы={results5a.rejected_groups}/{results5b.rejected_groups}, "
+          f"производительность={results5a.events_per_sec:.0f} событий/с")
+    print(f"Ожидаем: журнал с датами и перестановкой - 3 прихода, 3 обслужено")
+    print(f"Получили: приходов={results5c.arrived_groups}, обслужено={results5c.served_groups}")
+    
+    # Тест 6: Совпадение ядер моделирования SimPy и heap
+    print("\n📊 ТЕСТ 6: Совпадение ядер моделирования SimPy и heap")
+    scenarios = [
+        {'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'T': 50, 'S': 2, 'L': 30},
+        {'N': 30, 'M': 20, 'A': 20, 'B': 10, 'K': 3, 'T': 50, 'S': 1.5, 'L': 20},
+        {'N': 10, 'M': 0, 'A': 9, 'B': 0, 'K': 8, 'T': 50, 'S': 0.5, 'L': 15,
+         'arrival_dist': {'kind': 'exponential', 'mean': 10}},
+    ]
+    for params6 in scenarios:
+        rejected = {engine: [] for engine in ENGINES}
+        bad_ice = {engine: [] for engine in ENGINES}
+        for seed in range(20):
+            for engine in ENGINES:
+                results6 = run_simulation(dict(params6, seed=seed, verbose=False), engine=engine)
+                rejected[engine].append(results6.rejected_groups)
+                bad_ice[engine].append(results6.bad_ice_time)
+        print(f"Параметры: N={params6['N']}, K={params6['K']}, S={params6['S']}")
+        print(f"Ожидаем: одинаковые средние по 20 прогонам (общие зерна)")
+        print(f"Получили: отказы simpy={np.mean(rejected['simpy']):.2f}, heap={np.mean(rejected['heap']):.2f}; "
+              f"плохой лед simpy={np.mean(bad_ice['simpy']):.1f}, heap={np.mean(bad_ice['heap']):.1f} мин.")
+    # Журнал с целыми минутами: приходы совпадают по времени с окончанием игр и заливки
+    params6 = {'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 1, 'T': 1, 'S': 0.25, 'L': 5, 'seed': 7, 'verbose': False}
+    trace6 = [(0., 10.), (5., 10.), (10., 10.), (15., 5.), (15., 5.), (20., 5.), (25., 10.), (30., 5.), (35., 5.)]
+    results6 = {engine: run_simulation(params6, arrivals=iter(trace6), engine=engine) for engine in ENGINES}
+    print(f"Ожидаем: на журнале с целыми минутами одинаковые обслуженные, отказы и плохой лед")
+    print("Получили: " + "; ".join(f"{engine}: обслужено={r.served_groups}, отказов={r.rejected_groups}, "
+                                   f"плохой лед={r.bad_ice_time:.1f} мин." for engine, r in results6.items()))
+    
+    # Тест 7: Анализ чувствительности (скрининг Морриса)
+    print("\n📊 ТЕСТ 7: Анализ чувствительности (скрининг Морриса)")
+    screening = morris(trajectories=8, resamples=200)
+    rejection_effects = {factor: values['mu_star'] for factor, values in screening['rejection_rate'].items()}
+    ranking = sorted(rejection_effects, key=rejection_effects.get, reverse=True)
+    bad_ice_effects = {factor: values['mu_star'] for factor, values in screening['bad_ice_percent'].items()}
+    bad_ice_ranking = sorted(bad_ice_effects, key=bad_ice_effects.get, reverse=True)
+    print(f"Ожидаем: на отказы сильнее всего влияют N и A, на плохой лед - S и A, "
+          f"размер очереди K влияет на плохой лед слабо")
+    print(f"Получили: порядок влияния на отказы {', '.join(ranking)}; на плохой лед {', '.join(bad_ice_ranking)}; "
+          f"mu* для K по плохому льду={bad_ice_effects['K']:.3f}")
+    
+    # Тест 8: Оценка вероятности редкого события
+    print("\n📊 ТЕСТ 8: Оценка вероятности редкого события")
+    params8 = {'N': 30, 'M': 25, 'A': 12, 'B': 8, 'K': 2, 'T': 5, 'S': 2, 'L': 30}
+    crude = estimate_rare_event(params8, 'rejection', method='importance', strength=0.0, target_re=0.1)
+    splitting = estimate_rare_event(params8, 'rejection', method='splitting', target_re=0.1)
+    importance = estimate_rare_event(params8, 'rejection', method='importance', target_re=0.1)
+    print(f"Ожидаем: оценки расщепления и выборки по значимости совпадают с обычным Монте-Карло в пределах погрешности")
+    print(f"Получили: Монте-Карло={crude['probability']:.4f}±{crude['relative_error']:.2f}, "
+          f"расщепление={splitting['probability']:.4f}±{splitting['relative_error']:.2f}, "
+          f"значимость={importance['probability']:.4f}±{importance['relative_error']:.2f}")
+    # Без разброса времени игры (B=0) сдвигаются только интервалы прихода
+    params8b = dict(params8, B=0)
+    splitting_b = estimate_rare_event(params8b, 'rejection', method='splitting', target_re=0.1)
+    importance_b = estimate_rare_event(params8b, 'rejection', method='importance', target_re=0.1)
+    print(f"Ожидаем: при B=0 оценки расщепления и выборки по значимости также совпадают в пределах погрешности")
+    print(f"Получили: расщепление={splitting_b['probability']:.4f}±{splitting_b['relative_error']:.2f}, "
+          f"значимость={importance_b['probability']:.4f}±{importance_b['relative_error']:.2f}")
+    
+    # Тест 9: Хранилище результатов
+    print("\n📊 ТЕСТ 9: Хранилище результатов")
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultsStore(os.path.join(tmp, 'results.db'), batch_size=10) as store:
+            for K9 in range(1, 6):
+                params9 = {'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': K9, 'T': 10, 'S': 2, 'L': 30, 'seed': K9}
+                store.add_stats(params9, run_simulation(dict(params9, verbose=False), engine='heap'), 'heap')
+            rows = store.query({'K': (2, 4)})
+            series = store.load_series(rows[0]['id'])
+        print(f"Ожидаем: 3 результата с K от 2 до 4 и сохраненные ряды очереди")
+        print(f"Получили: {len(rows)} результата(ов), K={sorted(row['K'] for row in rows)}, "
+              f"точек очереди в первом: {len(series['queue_lengths'])}")
+    
+    # Тест 10: Сравнение сценариев с общими случайными числами
+    print("\n📊 ТЕСТ 10: Сравнение сценариев с общими случайными числами")
+    scenarios10 = build_scenarios({'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'T': 20, 'S': 2, 'L': 30}, {'K': [3, 8]})
+    finished10 = {label: summaries for label, _, _, summaries, _ in run_scenarios(scenarios10, replications=10, max_workers=2)}
+    independent = metric_intervals(finished10['K=8'])['rejection_rate'][1]
+    paired = paired_differences(finished10['K=3'], finished10['K=8'])['rejection_rate']
+    low10, high10 = paired['confidence_interval']
+    print(f"Ожидаем: оба сценария посчитаны, интервал парной разности уже интервала отдельного сценария")
+    print(f"Получили: сценарии {sorted(finished10)}, разность отказов {paired['difference']:+.2f} "
+          f"[{low10:+.2f}; {high10:+.2f}], полуширина отдельного сценария ±{independent:.2f}")
+    print(f"Ожидаем: квантиль Стьюдента за пределами таблицы 2.021 (40), 2.000 (60), 1.984 (99)")
+    print(f"Получили: {t_quantile(40):.3f}, {t_quantile(60):.3f}, {t_quantile(99):.3f}")
 
 if __name__ == "__main__":
     run_tests()
\ No newline at end of file
@@ -0,0 +1,180 @@
+# traces.py
+# Воспроизведение реальных журналов прихода групп (турникеты, бронирования).
+# Журнал читается потоково через mmap небольшими порциями и не загружается в память целиком
+import heapq
+import math
+import mmap
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from model import run_simulation
+
+# Формат бинарного журнала: момент прихода (мин) и время игры (мин, NaN - не записано)
+TRACE_DTYPE = np.dtype([('time', '<f8'), ('duration', '<f8')])
+
+# Размер порции разбора CSV (байт) и бинарного журнала (записей)
+CSV_CHUNK_BYTES = 1 << 20
+BINARY_CHUNK_RECORDS = 1 << 16
+
+# Расширения бинарных журналов
+BINARY_EXTENSIONS = ('.bin', '.trace')
+
+
+# Пустой файл нельзя отобразить в память - для него журнал просто пуст
+def _open_mmap(f):
+    if os.fstat(f.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# Разбор момента времени: число (минуты от начала) или дата ISO 8601. Дата без часового
+# пояса считается временем UTC, чтобы результат не зависел от пояса и перехода на летнее
+# время на машине, где воспроизводится журнал
+def _parse_time(field):
+    try:
+        return float(field), False
+    except ValueError:
+        moment = datetime.fromisoformat(field)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp() / 60, True
+
+
+# Потоковое чтение CSV-журнала: строки "время[,время игры]", заголовок необязателен.
+# Даты ISO 8601 переводятся в минуты от первой записи журнала (более ранние записи
+# получают отрицательное время, см. _shift_to_zero)
+def read_csv_trace(path, chunk_bytes=CSV_CHUNK_BYTES):
+    origin = None
+    first_line = True
+    with open(path, 'rb') as f:
+        mm = _open_mmap(f)
+        if mm is None:
+            return
+        with mm:
+            pos = 0
+            line_number = 0
+            size = len(mm)
+            while pos < size:
+                # Порция заканчивается на границе строки
+                end = mm.find(b'\n', min(pos + chunk_bytes, size - 1))
+                end = size if end == -1 else end + 1
+                for raw in mm[pos:end].decode('utf-8').splitlines():
+                    line_number += 1
+                    line = raw.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    header_allowed, first_line = first_line, False
+                    fields = [field.strip() for field in line.replace(';', ',').split(',')]
+                    try:
+                        arrival_time, is_date = _parse_time(fields[0])
+                    except ValueError:
+                        if header_allowed:
+                            continue  # заголовок
+                        raise ValueError(f"{path}:{line_number}: некорректное время прихода '{fields[0]}'") from None
+                    if is_date:
+                        if origin is None:
+                            origin = arrival_time
+                        arrival_time -= origin
+                    duration = float(fields[1]) if len(fields) > 1 and fields[1] else None
+                    yield arrival_time, duration
+                pos = end
+
+
+# Потоковое чтение бинарного журнала через np.memmap порциями фиксированного размера
+def read_binary_trace(path, chunk_records=BINARY_CHUNK_RECORDS):
+    if os.path.getsize(path) == 0:
+        return
+    records = np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+    for start in range(0, records.size, chunk_records):
+        chunk = records[start:start + chunk_records]
+        for arrival_time, duration in zip(chunk['time'].tolist(), chunk['duration'].tolist()):
+            yield arrival_time, (None if math.isnan(duration) else duration)
+
+
+def read_trace(path):
+    if path.lower().endswith(BINARY_EXTENSIONS):
+        return read_binary_trace(path)
+    return read_csv_trace(path)
+
+
+# Запись журнала в бинарный формат (порциями, без накопления в памяти)
+def write_binary_trace(path, records, chunk_records=BINARY_CHUNK_RECORDS):
+    count = 0
+    buffer = np.empty(chunk_records, dtype=TRACE_DTYPE)
+    with open(path, 'wb') as f:
+        filled = 0
+        for arrival_time, duration in records:
+            buffer[filled] = (arrival_time, np.nan if duration is None else duration)
+            filled += 1
+            if filled == chunk_records:
+                buffer.tofile(f)
+                count += filled
+                filled = 0
+        buffer[:filled].tofile(f)
+        count += filled
+    return count
+
+
+# Перевод CSV-журнала в бинарный формат для быстрого повторного воспроизведения
+def convert_csv_to_binary(csv_path, binary_path):
+    return write_binary_trace(binary_path, read_csv_trace(csv_path))
+
+
+# Упорядочивание записей по времени: окно window позволяет исправить локальные
+# перестановки (например, в журнале бронирований), большие нарушения порядка - ошибка
+def in_time_order(records, window=0):
+    heap = []
+    last_time = -math.inf
+    for seq, (arrival_time, duration) in enumerate(records):
+        heapq.heappush(heap, (arrival_time, seq, duration))
+        if len(heap) > window:
+            arrival_time, _, duration = heapq.heappop(heap)
+            if arrival_time < last_time:
+                raise ValueError(f"Журнал не упорядочен по времени: запись {seq} ({arrival_time:.2f} мин.) "
+                                 f"раньше предыдущей ({last_time:.2f} мин.)")
+            last_time = arrival_time
+            yield arrival_time, duration
+    while heap:
+        arrival_time, _, duration = heapq.heappop(heap)
+        if arrival_time < last_time:
+            raise ValueError(f"Журнал не упорядочен по времени: {arrival_time:.2f} мин. раньше {last_time:.2f} мин.")
+        last_time = arrival_time
+        yield arrival_time, duration
+
+
+# Отсчет времени от самой ранней записи: после упорядочивания журнал с датами может начинаться
+# с записи раньше первой строки файла (отрицательное время), тогда все времена сдвигаются
+def _shift_to_zero(records):
+    offset = None
+    for arrival_time, duration in records:
+        if offset is None:
+            offset = min(arrival_time, 0.0)
+        yield arrival_time - offset, duration
+
+
+# Прогон модели по журналу. По умолчанию журнал событий и временные ряды
+# не собираются, чтобы память не росла с длиной журнала. Для длинных журналов
+# быстрее облегченное ядро (engine="heap")
+def replay_trace(path, params, reorder_window=0, engine="simpy"):
+    params = dict(params)
+    params.setdefault('verbose', False)
+    params.setdefault('record_series', False)
+    arrivals = _shift_to_zero(in_time_order(read_trace(path), reorder_window))
+    return run_simulation(params, arrivals=arrivals, engine=engine)
+
+
+if __name__ == "__main__":
+    # Пример: python traces.py arrivals.csv 1000 heap  (время моделирования в часах, ядро)
+    trace_path = sys.argv[1]
+    params = {
+        'N': 5, 'M': 4, 'A': 12, 'B': 8, 'K': 5, 'S': 2, 'L': 30,
+        'T': float(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    }
+    engine = sys.argv[3] if len(sys.argv) > 3 else 'simpy'
+    results = replay_trace(trace_path, params, engine=engine)
+    print(f"Приходов воспроизведено: {results.arrived_groups}")
+    print(f"Обслужено: {results.served_groups}, отказов: {results.rejected_groups}")
+    print(f"Производительность: {results.events_per_sec:.0f} событий/с ({results.wall_time:.2f} с)")